@@ -15,6 +15,7 @@
 
 
 import unittest
+from contextlib import ExitStack
 from unittest.mock import patch
 from shared.lumi_doc import (
     LumiAbstract,
@@ -40,6 +41,22 @@ from shared.types import ArxivMetadata
 from dataclasses import asdict
 
 
+_MARKDOWN_INTERLEAVED = f"Some text {import_tags.L_IMG_START_PREFIX}fig1.png{import_tags.L_IMG_END} and more text {import_tags.L_HTML_START_PREFIX}T1{import_tags.L_HTML_END}<div>\$[[l-ref]]</div>{import_tags.L_HTML_START_PREFIX}T1{import_tags.L_HTML_END}{import_tags.L_HTML_CAP_START_PREFIX}T1{import_tags.L_HTML_CAP_END}Cap{import_tags.L_HTML_CAP_START_PREFIX}T1{import_tags.L_HTML_CAP_END}"
+
+_MARKDOWN_SUBFIGURES = f"""
+        {import_tags.L_FIG_START_PREFIX}FIG1{import_tags.L_FIG_END}
+            {import_tags.L_IMG_START_PREFIX}sub1.png{import_tags.L_IMG_END}
+                {import_tags.L_IMG_CAP_START_PREFIX}sub1.png{import_tags.L_IMG_CAP_END}
+                    Sub 1 Cap
+                {import_tags.L_IMG_CAP_START_PREFIX}sub1.png{import_tags.L_IMG_CAP_END}
+            {import_tags.L_IMG_START_PREFIX}sub2.png{import_tags.L_IMG_END}
+        {import_tags.L_FIG_END_PREFIX}FIG1{import_tags.L_FIG_END}
+        {import_tags.L_FIG_CAP_START_PREFIX}FIG1{import_tags.L_FIG_CAP_END}
+            Main Cap
+        {import_tags.L_FIG_CAP_START_PREFIX}FIG1{import_tags.L_FIG_CAP_END}
+        """
+
+
 class PreprocessAndReplaceFiguresTest(unittest.TestCase):
     @patch.object(convert_lumi_spans, "get_unique_id", return_value="123")
     @patch.object(convert_html_to_lumi, "get_unique_id")
@@ -53,16 +70,19 @@ class PreprocessAndReplaceFiguresTest(unittest.TestCase):
         del mock_convert_html_get_unique_id  # unused
 
         self.maxDiff = None
-        markdown_input = f"Some text {import_tags.L_IMG_START_PREFIX}fig1.png{import_tags.L_IMG_END} and more text {import_tags.L_HTML_START_PREFIX}T1{import_tags.L_HTML_END}<div>\$[[l-ref]]</div>{import_tags.L_HTML_START_PREFIX}T1{import_tags.L_HTML_END}{import_tags.L_HTML_CAP_START_PREFIX}T1{import_tags.L_HTML_CAP_END}Cap{import_tags.L_HTML_CAP_START_PREFIX}T1{import_tags.L_HTML_CAP_END}"
         placeholder_map = {}
 
         # The mock needs to provide enough unique IDs for all calls within preprocess_and_replace_figures.
         # In this case: 1 for the HTML figure, 1 for its caption, and 1 for the image.
-        mock_get_unique_id.side_effect = ["html_id_1", "image_id_1"]
-        mock_convert_lumi_spans_get_unique_id.side_effect = ["caption_id_1"]
+        ids = iter(("html_id_1", "image_id_1"))
+        caption_ids = iter(("caption_id_1",))
+        mock_get_unique_id.side_effect = lambda *args, **kwargs: next(ids)
+        mock_convert_lumi_spans_get_unique_id.side_effect = (
+            lambda *args, **kwargs: next(caption_ids)
+        )
 
         processed_markdown = import_pipeline.preprocess_and_replace_figures(
-            markdown_input, "file_id", placeholder_map
+            _MARKDOWN_INTERLEAVED, "file_id", placeholder_map
         )
 
         # Check the processed HTML string
@@ -96,22 +116,9 @@ class PreprocessAndReplaceFiguresTest(unittest.TestCase):
     def test_figure_with_subfigures(self, mock_get_unique_id):
         self.maxDiff = None
         mock_get_unique_id.return_value = "uid"
-        markdown_input = f"""
-        {import_tags.L_FIG_START_PREFIX}FIG1{import_tags.L_FIG_END}
-            {import_tags.L_IMG_START_PREFIX}sub1.png{import_tags.L_IMG_END}
-                {import_tags.L_IMG_CAP_START_PREFIX}sub1.png{import_tags.L_IMG_CAP_END}
-                    Sub 1 Cap
-                {import_tags.L_IMG_CAP_START_PREFIX}sub1.png{import_tags.L_IMG_CAP_END}
-            {import_tags.L_IMG_START_PREFIX}sub2.png{import_tags.L_IMG_END}
-        {import_tags.L_FIG_END_PREFIX}FIG1{import_tags.L_FIG_END}
-        {import_tags.L_FIG_CAP_START_PREFIX}FIG1{import_tags.L_FIG_CAP_END}
-            Main Cap
-        {import_tags.L_FIG_CAP_START_PREFIX}FIG1{import_tags.L_FIG_CAP_END}
-        """
-
         placeholder_map = {}
         processed_markdown = import_pipeline.preprocess_and_replace_figures(
-            markdown_input, "file_id", placeholder_map
+            _MARKDOWN_SUBFIGURES, "file_id", placeholder_map
         )
 
         expected_placeholder_id = "[[LUMI_PLACEHOLDER_uid]]"
@@ -135,22 +142,21 @@ class PreprocessAndReplaceFiguresTest(unittest.TestCase):
 
 
 class ImportPipelineTest(unittest.TestCase):
-    @patch.object(convert_lumi_spans, "get_unique_id", return_value="123")
-    @patch.object(convert_html_to_lumi, "get_unique_id", return_value="123")
-    @patch.object(extract_concepts, "get_unique_id", return_value="123")
+    def setUp(self):
+        # All generated ids are pinned to "123" so expected docs are stable.
+        self._stack = ExitStack()
+        self.addCleanup(self._stack.close)
+        for module in (convert_lumi_spans, convert_html_to_lumi, extract_concepts):
+            self._stack.enter_context(
+                patch.object(module, "get_unique_id", return_value="123")
+            )
+
     @patch("import_pipeline.markdown_utils.parse_lumi_import")
     def test_convert_model_output_to_lumi_doc_with_abstract(
-        self,
-        mock_parse_lumi_import,
-        mock_get_unique_id_extract_concepts,
-        mock_get_unique_id_convert_html_to_lumi,
-        mock_get_unique_id_convert_lumi_spans,
+        self, mock_parse_lumi_import
     ):
         """Tests that concept inner tags in abstract are correctly parsed."""
         self.maxDiff = None
-        del mock_get_unique_id_extract_concepts  # unused
-        del mock_get_unique_id_convert_html_to_lumi  # unused
-        del mock_get_unique_id_convert_lumi_spans  # unused
 
         # Mock the output of the markdown parser
         mock_parse_lumi_import.return_value = {
@@ -200,19 +206,11 @@ class ImportPipelineTest(unittest.TestCase):
 
         self.assertEqual(asdict(expected_abstract), asdict(lumi_doc.abstract))
 
-    @patch.object(convert_lumi_spans, "get_unique_id", return_value="123")
-    @patch.object(convert_html_to_lumi, "get_unique_id", return_value="123")
     @patch("import_pipeline.markdown_utils.parse_lumi_import")
     def test_convert_model_output_to_lumi_doc_with_references(
-        self,
-        mock_parse_lumi_import,
-        mock_get_unique_id_convert_html_to_lumi,
-        mock_get_unique_id_convert_lumi_spans,
+        self, mock_parse_lumi_import
     ):
         """Tests that inner tags in references are correctly parsed."""
-        del mock_get_unique_id_convert_html_to_lumi  # unused
-        del mock_get_unique_id_convert_lumi_spans  # unused
-
         self.maxDiff = None
 
         # Mock the output of the markdown parser
@@ -270,25 +268,17 @@ class ImportPipelineTest(unittest.TestCase):
         )
 
         # Assert that the references in the LumiDoc are what we expect
-        self.assertEqual(len(expected_references), len(lumi_doc.references))
-        for i in range(len(expected_references)):
-            self.assertEqual(
-                asdict(expected_references[i]), asdict(lumi_doc.references[i])
-            )
+        self.assertEqual(
+            [asdict(r) for r in expected_references],
+            [asdict(r) for r in lumi_doc.references],
+        )
 
-    @patch.object(convert_lumi_spans, "get_unique_id", return_value="123")
-    @patch.object(convert_html_to_lumi, "get_unique_id", return_value="123")
     @patch("import_pipeline.markdown_utils.parse_lumi_import")
     def test_convert_model_output_to_lumi_doc_with_footnotes(
-        self,
-        mock_parse_lumi_import,
-        mock_get_unique_id_html_to_lumi,
-        mock_get_unique_id_lumi_spans,
+        self, mock_parse_lumi_import
     ):
         """Tests that footnotes are correctly parsed."""
         self.maxDiff = None
-        del mock_get_unique_id_html_to_lumi  # unused
-        del mock_get_unique_id_lumi_spans  # unused
 
         # Mock the output of the markdown parser
         footnotes_string = f"{import_tags.L_FOOTNOTE_CONTENT_START_PREFIX}1{import_tags.L_FOOTNOTE_CONTENT_END}Footnote 1 text.{import_tags.L_FOOTNOTE_CONTENT_END_PREFIX}1{import_tags.L_FOOTNOTE_CONTENT_END}{import_tags.L_FOOTNOTE_CONTENT_START_PREFIX}2{import_tags.L_FOOTNOTE_CONTENT_END}Footnote <b>2</b> text.{import_tags.L_FOOTNOTE_CONTENT_END_PREFIX}2{import_tags.L_FOOTNOTE_CONTENT_END}"
@@ -337,11 +327,10 @@ class ImportPipelineTest(unittest.TestCase):
         )
 
         # Assert that the footnotes in the LumiDoc are what we expect
-        self.assertEqual(len(expected_footnotes), len(lumi_doc.footnotes))
-        for i in range(len(expected_footnotes)):
-            self.assertEqual(
-                asdict(expected_footnotes[i]), asdict(lumi_doc.footnotes[i])
-            )
+        self.assertEqual(
+            [asdict(f) for f in expected_footnotes],
+            [asdict(f) for f in lumi_doc.footnotes],
+        )
 
     @patch("import_pipeline.import_pipeline.convert_model_output_to_lumi_doc")
     @patch("import_pipeline.import_pipeline.gemini")
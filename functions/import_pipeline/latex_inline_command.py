@@ -23,12 +23,51 @@ with default values, and nested command definitions.
 The main public function is `inline_custom_commands`.
 """
 
-from typing import List, Optional, Tuple
+from __future__ import annotations
+
+import functools
+import heapq
+import re
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+__all__ = [
+    "Command",
+    "LatexParser",
+    "find_and_parse_commands",
+    "replace_command_usages",
+    "remove_custom_definitions",
+    "inline_custom_commands",
+]
 
 # A list of command definition keywords that are supported. They are expected
 # to share the same syntax as \newcommand.
 _SUPPORTED_COMMAND_DEFS = [r"\newcommand", r"\DeclareRobustCommand", r"\def"]
 
+# Matches any supported definition keyword in a single scan. The lookahead
+# keeps longer control words (e.g. `\default`) from matching `\def`.
+_COMMAND_DEF_PATTERN = re.compile(
+    "(?:"
+    + "|".join(re.escape(cmd) for cmd in _SUPPORTED_COMMAND_DEFS)
+    + ")(?![A-Za-z])"
+)
+
+# Matches a (possibly empty) run of whitespace, as defined by str.isspace.
+_WHITESPACE_PATTERN = re.compile(r"\s*")
+
+# Matches braces that are not escaped as \{ or \}.
+_UNESCAPED_BRACE_PATTERN = re.compile(r"(?<!\\)[{}]")
+
+# Matches the parameter text of a \def up to its first unescaped brace.
+_PARAMETER_TEXT_PATTERN = re.compile(r"(?:\\.|[^{\\])*", re.DOTALL)
+
+# Matches argument placeholders (#1 to #9) in a command definition.
+_PLACEHOLDER_PATTERN = re.compile(r"#([1-9])")
+
+# The maximum number of nested usages the one-pass expander expands before it
+# gives up. An argument can grow at every level (e.g. `\a{\a}` where `\a` is
+# `#1{#1#1}`), so deeper usages are left to the capped iterative expansion.
+_MAX_EXPANSION_DEPTH = 10
+
 
 class Command:
     """A class to represent a LaTeX `\\newcommand` definition."""
@@ -54,6 +93,45 @@ class Command:
         self.definition = definition
         self.optional_default = optional_default
 
+    @functools.cached_property
+    def usage_pattern(self) -> re.Pattern:
+        """A compiled pattern matching usages of this command's name.
+
+        If the name ends in a letter, the pattern will not match it as a prefix
+        of a longer command name. E.g., `\\c` does not match `\\command`.
+        """
+        pattern = re.escape(self.name)
+        if self.name[-1].isalpha():
+            pattern += "(?![A-Za-z])"
+        return re.compile(pattern)
+
+    @functools.cached_property
+    def _template(self) -> List[Union[str, int]]:
+        """The definition split around its #N placeholders.
+
+        Even indices hold literal text and odd indices hold the zero-based
+        index of the argument that replaces the placeholder.
+        """
+        parts = _PLACEHOLDER_PATTERN.split(self.definition)
+        return [int(part) - 1 if k % 2 else part for k, part in enumerate(parts)]
+
+    def expand(self, args: List[str]) -> str:
+        """Returns the definition with #1, #2, ... replaced by the given args.
+
+        Placeholders without a corresponding argument are left untouched.
+        """
+        template = self._template
+        if len(template) == 1 or not args:
+            return self.definition
+
+        num_args = len(args)
+        return "".join(
+            part
+            if k % 2 == 0
+            else (args[part] if part < num_args else f"#{part + 1}")
+            for k, part in enumerate(template)
+        )
+
     def __repr__(self) -> str:
         return f"Command({self.name}, {self.nargs}, {self.definition}, {self.optional_default})"
 
@@ -84,8 +162,7 @@ class LatexParser:
 
     def _skip_space(self):
         """Advances the parser's position past any whitespace."""
-        while self.pos < self.n and self.content[self.pos].isspace():
-            self.pos += 1
+        self.pos = _WHITESPACE_PATTERN.match(self.content, self.pos).end()
 
     def parse_braces(self) -> Optional[str]:
         """Parses content within the next pair of unescaped braces, e.g., `{...}`.
@@ -100,24 +177,23 @@ class LatexParser:
             pair of braces is not found.
         """
         self._skip_space()
-        if self.pos >= self.n or self.content[self.pos] != "{":
+        content, pos = self.content, self.pos
+        if pos >= self.n or content[pos] != "{":
             return None
 
         brace_level = 1
-        start_brace = self.pos + 1
-        j = start_brace
-        while j < self.n:
-            # Check for escaped characters to avoid misinterpreting \{ and \}
-            if self.content[j] == "{" and self.content[j - 1] != "\\":
+        start_brace = pos + 1
+        # Jump between unescaped braces only, skipping everything in between.
+        for match in _UNESCAPED_BRACE_PATTERN.finditer(content, start_brace):
+            if match.group() == "{":
                 brace_level += 1
-            elif self.content[j] == "}" and self.content[j - 1] != "\\":
+            else:
                 brace_level -= 1
 
             if brace_level == 0:
-                result = self.content[start_brace:j]
+                j = match.start()
                 self.pos = j + 1
-                return result
-            j += 1
+                return content[start_brace:j]
         return None  # Unmatched brace
 
     def parse_brackets(self) -> Optional[str]:
@@ -157,59 +233,46 @@ class LatexParser:
             command token is not found.
         """
         self._skip_space()
-        if self.pos >= self.n or self.content[self.pos] != "\\":
+        content, pos, n = self.content, self.pos, self.n
+        if pos >= n or content[pos] != "\\":
             return None
 
-        start_cmd = self.pos
-        self.pos += 1  # Skip the backslash
+        start_cmd = pos
+        pos += 1  # Skip the backslash
 
-        if self.pos >= self.n:
+        if pos >= n:
+            self.pos = pos
             return None
 
-        if self.content[self.pos].isalpha():
-            while self.pos < self.n and self.content[self.pos].isalpha():
-                self.pos += 1
-        elif self.content[self.pos] != " ":
+        if content[pos].isalpha():
+            while pos < n and content[pos].isalpha():
+                pos += 1
+        elif content[pos] != " ":
             # Command is a single non-letter symbol (e.g., \&)
-            self.pos += 1
+            pos += 1
 
-        return self.content[start_cmd : self.pos]
+        self.pos = pos
+        return content[start_cmd:pos]
 
     def parse_parameter_text(self) -> Optional[str]:
         """Parses the parameter text of a LaTeX def command."""
         # Find parameter text (e.g., #1#2)
         # to do this we find the opening brace of the definition
         self._skip_space()
-        brace_pos = -1
         param_start = self.pos
-        while self.pos < self.n:
-            char = self.content[self.pos]
-            if char == "{":
-                brace_pos = self.pos
-                break
-            elif char == "\\" and self.pos + 1 < self.n:
-                self.pos += 1  # Skip next character (escaped)
-            self.pos += 1
-        if brace_pos == -1:  # No definition brace found
-            return None
-        param_text = self.content[param_start:brace_pos]
-        return param_text
+        brace_pos = _PARAMETER_TEXT_PATTERN.match(self.content, param_start).end()
+        if brace_pos >= self.n or self.content[brace_pos] != "{":
+            return None  # No definition brace found
+        self.pos = brace_pos
+        return self.content[param_start:brace_pos]
 
 
 def _find_next_command_def(content: str, start_pos: int) -> Optional[Tuple[str, int]]:
     """Finds the earliest occurrence of any supported command definition."""
-    found_command = None
-    start_index = -1
-
-    for cmd in _SUPPORTED_COMMAND_DEFS:
-        idx = content.find(cmd, start_pos)
-        if idx != -1 and (start_index == -1 or idx < start_index):
-            start_index = idx
-            found_command = cmd
-
-    if found_command:
-        return found_command, start_index
-    return None
+    match = _COMMAND_DEF_PATTERN.search(content, start_pos)
+    if match is None:
+        return None
+    return match.group(), match.start()
 
 
 def _get_command_from_def_style(parser: LatexParser, found_command: str) -> Optional[Tuple[str, int, str]]:
@@ -224,10 +287,11 @@ def _get_command_from_def_style(parser: LatexParser, found_command: str) -> Opti
     # Count arguments by finding the highest #N in the param text
     j = 0
     nargs = 0
-    while j < len(param_text):
+    param_len = len(param_text)
+    while j < param_len:
         if (
             param_text[j] == "#"
-            and j + 1 < len(param_text)
+            and j + 1 < param_len
             and param_text[j + 1].isdigit()
         ):
             digit = int(param_text[j + 1])
@@ -241,88 +305,175 @@ def _get_command_from_def_style(parser: LatexParser, found_command: str) -> Opti
 
 
 
-def find_and_parse_commands(content: str) -> List[Command]:
-    """Finds and parses all custom command definitions in a string.
+def _parse_command_definition(
+    content: str, found_command: str, start_index: int
+) -> Optional[Tuple[Command, int]]:
+    """Parses a single command definition starting at `start_index`.
 
-    This function scans the input content for command definitions like
-    `\\newcommand` and `\\def`, and extracts their name, number of arguments,
-    optional default value, and the definition body.
+    Args:
+        content: The LaTeX content containing the definition.
+        found_command: The definition keyword found at `start_index` (e.g.,
+          r'\\newcommand').
+        start_index: The position of the definition keyword.
+
+    Returns:
+        A tuple of the parsed Command and the position just after its
+        definition, or None if the definition could not be parsed.
+    """
+    parser_start_pos = start_index + len(found_command)
+    # Check for an optional star `*` which can follow \newcommand.
+    # We can just skip it as it doesn't affect argument parsing for our needs.
+    if (
+        found_command != r"\def"
+        and parser_start_pos < len(content)
+        and content[parser_start_pos] == "*"
+    ):
+        parser_start_pos += 1
+
+    parser = LatexParser(content, parser_start_pos)
+
+    optional_default = None
+
+    if found_command == r"\def":
+        # --- Handle \def syntax: \def\name<params>{definition} ---
+
+        command_details = _get_command_from_def_style(parser, found_command)
+        if command_details is None:
+            return None
+
+        name, nargs, definition = command_details
+    else:
+        # --- Handle \newcommand syntax: \cmd{name}[nargs][opt]{def} ---
+
+        # 1. Parse the command name, which is required (e.g., `{\\R}`).
+        name = parser.parse_braces()
+        if name is None:
+            return None
+
+        # 2. Parse the optional number of arguments (e.g., `[1]`).
+        nargs_str = parser.parse_brackets()
+        if nargs_str is not None:
+            try:
+                nargs = int(nargs_str)
+            except (ValueError, TypeError):
+                nargs = 0  # Not a valid number, assume 0 args.
+        else:
+            nargs = 0
+
+        # 3. Parse the optional default value for the first argument (e.g., `[default]`).
+        optional_default = parser.parse_brackets()
+
+        # 4. Parse the command definition, which is required (e.g., `{\\mathbb{R}}`).
+        definition = parser.parse_braces()
+    if definition is None:
+        return None
+
+    return Command(name, nargs, definition, optional_default), parser.pos
+
+
+def _find_command_definitions(
+    content: str,
+) -> Tuple[List[Command], List[Tuple[int, int]]]:
+    """Parses all command definitions and records where each one appears.
 
     Args:
         content: The LaTeX content to search.
 
     Returns:
-        A list of Command objects representing the parsed definitions.
+        A tuple of the parsed Command objects and the (start, end) range of
+        each definition in the content, in order.
     """
     commands = []
+    spans = []
     i = 0
-    while i < len(content):
+    n = len(content)
+    while i < n:
         match = _find_next_command_def(content, i)
         if match is None:
             break
 
         found_command, start_index = match
-        parser_start_pos = start_index + len(found_command)
-        # Check for an optional star `*` which can follow \newcommand.
-        # We can just skip it as it doesn't affect argument parsing for our needs.
-        if (
-            found_command != r"\def"
-            and parser_start_pos < len(content)
-            and content[parser_start_pos] == "*"
-        ):
-            parser_start_pos += 1
+        parsed = _parse_command_definition(content, found_command, start_index)
+        if parsed is None:
+            # If parsing fails, advance past the command to avoid infinite loop.
+            i = start_index + len(found_command)
+            continue
 
-        parser = LatexParser(content, parser_start_pos)
+        command, i = parsed
+        commands.append(command)
+        spans.append((start_index, i))
 
-        name = None
-        nargs = 0
-        definition = None
-        optional_default = None
+    return commands, spans
 
-        if found_command == r"\def":
-            # --- Handle \def syntax: \def\name<params>{definition} ---
 
-            command_details = _get_command_from_def_style(parser, found_command)
+def _remove_spans(content: str, spans: List[Tuple[int, int]]) -> str:
+    """Removes the given ordered, non-overlapping (start, end) ranges."""
+    output = []
+    last_end = 0
+    for start, end in spans:
+        output.append(content[last_end:start])
+        last_end = end
+    output.append(content[last_end:])
+    return "".join(output)
 
-            if command_details is None:
-                continue
 
-            name, nargs, definition = command_details
-            optional_default = None
-        else:
-            # --- Handle \newcommand syntax: \cmd{name}[nargs][opt]{def} ---
+def find_and_parse_commands(content: str) -> List[Command]:
+    """Finds and parses all custom command definitions in a string.
 
-            # 1. Parse the command name, which is required (e.g., `{\\R}`).
-            name = parser.parse_braces()
-            if name is None:
-                # If parsing fails, advance past the command to avoid infinite loop.
-                i = start_index + len(found_command)
-                continue
+    This function scans the input content for command definitions like
+    `\\newcommand` and `\\def`, and extracts their name, number of arguments,
+    optional default value, and the definition body.
 
-            # 2. Parse the optional number of arguments (e.g., `[1]`).
-            nargs_str = parser.parse_brackets()
-            if nargs_str is not None:
-                try:
-                    nargs = int(nargs_str)
-                except (ValueError, TypeError):
-                    nargs = 0  # Not a valid number, assume 0 args.
-            else:
-                nargs = 0
+    Args:
+        content: The LaTeX content to search.
 
-            # 3. Parse the optional default value for the first argument (e.g., `[default]`).
-            optional_default = parser.parse_brackets()
+    Returns:
+        A list of Command objects representing the parsed definitions.
+    """
+    commands, _ = _find_command_definitions(content)
+    return commands
 
-            # 4. Parse the command definition, which is required (e.g., `{\\mathbb{R}}`).
-            definition = parser.parse_braces()
-        if definition is None:
-            i = start_index + len(found_command)
-            continue
 
-        commands.append(Command(name, nargs, definition, optional_default))
-        # Move the search position past the successfully parsed command.
-        i = parser.pos
+def _parse_usage_args(
+    content: str, command: Command, pos: int
+) -> Optional[Tuple[List[str], int]]:
+    """Parses the arguments of a command usage whose name ends at `pos`.
 
-    return commands
+    Args:
+        content: The string containing the usage.
+        command: The Command being used.
+        pos: The position just after the command name.
+
+    Returns:
+        A tuple of the parsed argument strings and the position after the last
+        argument, or None if a required argument is missing.
+    """
+    parser = LatexParser(content, pos)
+    args = []
+
+    num_req_args = command.nargs
+    if command.optional_default is not None:
+        # Check for an optional argument provided in brackets. Only a bracket
+        # or whitespace can start one, so skip the parser call otherwise.
+        next_char = content[pos : pos + 1]
+        if next_char == "[" or next_char.isspace():
+            optional_arg = parser.parse_brackets()
+        else:
+            optional_arg = None
+        if optional_arg is not None:
+            args.append(optional_arg)
+        else:
+            # Optional argument is not present, so use the default.
+            args.append(command.optional_default)
+        num_req_args -= 1
+
+    for _ in range(num_req_args):
+        required_arg = parser.parse_braces()
+        if required_arg is None:
+            return None
+        args.append(required_arg)
+
+    return args, parser.pos
 
 
 def _find_command_usage(
@@ -349,52 +500,20 @@ def _find_command_usage(
     """
     search_pos = start_index
     while True:
-        match_start = content.find(command.name, search_pos)
-        if match_start == -1:
+        match = command.usage_pattern.search(content, search_pos)
+        if match is None:
             return None
-
-        # If the command name ends in a letter, ensure it's not just a prefix
-        # of a longer command name. E.g., `\c` should not match `\command`.
-        if command.name[-1].isalpha():
-            char_after_match_idx = match_start + len(command.name)
-            if (
-                char_after_match_idx < len(content)
-                and content[char_after_match_idx].isalpha()
-            ):
-                # It's a prefix of a longer command. Skip this match and
-                # continue searching from the next character.
-                search_pos = match_start + 1
-                continue
+        match_start = match.start()
 
         # This looks like a valid command. Now parse arguments.
-        parser = LatexParser(content, match_start + len(command.name))
-        args = []
-
-        num_req_args = command.nargs
-        if command.optional_default is not None:
-            # Check for an optional argument provided in brackets.
-            optional_arg = parser.parse_brackets()
-            if optional_arg is not None:
-                args.append(optional_arg)
-            else:
-                # Optional argument is not present, so use the default.
-                args.append(command.optional_default)
-            num_req_args -= 1
-
-        all_args_found = True
-        for _ in range(num_req_args):
-            required_arg = parser.parse_braces()
-            if required_arg is None:
-                all_args_found = False
-                break
-            args.append(required_arg)
+        parsed = _parse_usage_args(content, command, match.end())
+        if parsed is not None:
+            args, end = parsed
+            return match_start, end, args
 
-        if all_args_found:
-            return match_start, parser.pos, args
-        else:
-            # Argument parsing failed. Continue searching from after this
-            # failed match.
-            search_pos = match_start + 1
+        # Argument parsing failed. Continue searching from after this
+        # failed match.
+        search_pos = match_start + 1
 
 
 def replace_command_usages(content: str, command: Command) -> str:
@@ -411,9 +530,17 @@ def replace_command_usages(content: str, command: Command) -> str:
     Returns:
         A new string with all usages of the command replaced.
     """
+    if command.nargs == 0 and command.optional_default is None:
+        # Without arguments every usage expands to the same definition.
+        definition = command.definition
+        return command.usage_pattern.sub(lambda _: definition, content)
+
+    # Usages with identical arguments share a single expansion.
+    expansions: Dict[Tuple[str, ...], str] = {}
     output = []
     i = 0
-    while i < len(content):
+    n = len(content)
+    while i < n:
         result = _find_command_usage(content, command, i)
         if result is None:
             # No more usages found, append the rest of the content.
@@ -426,11 +553,12 @@ def replace_command_usages(content: str, command: Command) -> str:
         output.append(content[i:match_start])
 
         # Perform the replacement by substituting arguments into the definition.
-        definition = command.definition
-        for idx, arg in enumerate(args):
-            placeholder = f"#{idx + 1}"
-            definition = definition.replace(placeholder, arg)
-        output.append(definition)
+        key = tuple(args)
+        expansion = expansions.get(key)
+        if expansion is None:
+            expansion = command.expand(args)
+            expansions[key] = expansion
+        output.append(expansion)
 
         # Move the main index past the command usage we just processed.
         i = match_end
@@ -452,66 +580,191 @@ def remove_custom_definitions(content: str) -> str:
     Returns:
         A new string with all custom command definitions removed.
     """
-    output = []
-    i = 0
-    n = len(content)
-    while i < n:
-        match = _find_next_command_def(content, i)
-        if match is None:
-            # No more commands, append the rest of the string and finish.
-            output.append(content[i:])
-            break
+    _, spans = _find_command_definitions(content)
+    return _remove_spans(content, spans)
 
-        found_command, start_index = match
-        # Append the text that comes before this command definition.
-        output.append(content[i:start_index])
 
-        parser_start_pos = start_index + len(found_command)
-        # Check for an optional star `*` and skip it.
-        if parser_start_pos < n and content[parser_start_pos] == "*":
-            parser_start_pos += 1
+class _ExpansionAbortedError(Exception):
+    """Raised when a usage cannot be expanded in one pass."""
 
-        parser = LatexParser(content, parser_start_pos)
 
-        if found_command == r"\def":
-            # --- Skip \def syntax ---
+class _OnePassExpander:
+    """Expands the usages of all commands in one traversal.
 
-            # 1. Skip over the command name.
-            if parser.parse_command_name() is None:
-                i = start_index + len(found_command)
-                continue
+    All commands are matched by a single pattern, and each expansion is
+    expanded recursively before it is emitted, so nested usages are resolved
+    without rescanning the whole content once per command. This is only used
+    if the definitions are acyclic and `is_supported` holds. A usage whose
+    arguments cannot be parsed is skipped and not retried, so callers must
+    check that no usage is left in the result. An expansion that reproduces a
+    usage still being expanded, or that nests too deeply, raises
+    `_ExpansionAbortedError` so that callers can fall back to expanding
+    iteratively.
+    """
 
-            # 2. Skip over param text.
-            parser.parse_parameter_text()
+    def __init__(self, commands: List[Command]):
+        """Initializes the expander.
 
-            # 3. Skip over the main definition body.
-            if parser.parse_braces() is None:
-                i = start_index + len(found_command)
-                continue
+        Args:
+            commands: The parsed commands.
+        """
+        self.commands = commands
+        self.commands_by_name = {command.name: command for command in commands}
+
+        # Longer names are tried first so that a name is never matched as the
+        # prefix of another.
+        names = sorted(self.commands_by_name, key=len, reverse=True)
+        usage_alternatives = "|".join(
+            self.commands_by_name[name].usage_pattern.pattern for name in names
+        )
+        self.usage_pattern = re.compile(usage_alternatives)
+        self._expansions: Dict[Tuple[str, Tuple[str, ...]], str] = {}
+        # The usages whose expansion is currently being expanded.
+        self._in_progress: Set[Tuple[str, Tuple[str, ...]]] = set()
+
+    def is_supported(self) -> bool:
+        """Returns whether the commands can be expanded in one pass.
+
+        This requires every command used inside a definition to find its
+        arguments within that definition. A command with an optional argument
+        must not be used inside a definition, since the argument may be
+        supplied at the call site instead (e.g. `\\vv[y]` where `\\vv` is
+        `\\vect`).
+        """
+        for command in self.commands:
+            for match in self.usage_pattern.finditer(command.definition):
+                used_command = self.commands_by_name[match.group()]
+                if used_command.optional_default is not None:
+                    return False
+                if (
+                    _parse_usage_args(command.definition, used_command, match.end())
+                    is None
+                ):
+                    return False
+        return True
+
+    def expand(self, content: str) -> str:
+        """Expands all command usages in the content.
 
-        else:
-            # --- Skip \newcommand syntax  ---
+        Args:
+            content: The string to expand, without command definitions.
+
+        Returns:
+            The expanded content.
+
+        Raises:
+            _ExpansionAbortedError: If a usage expands to itself, or the usages
+                nest more than `_MAX_EXPANSION_DEPTH` deep.
+        """
+        output = []
+        i = 0
+        search_pos = 0
+        while True:
+            match = self.usage_pattern.search(content, search_pos)
+            if match is None:
+                break
 
-            # 1. Skip over the command name.
-            if parser.parse_braces() is None:
-                i = start_index + len(found_command)
+            command = self.commands_by_name[match.group()]
+            parsed_usage = _parse_usage_args(content, command, match.end())
+            if parsed_usage is None:
+                search_pos = match.start() + 1
                 continue
 
-            # 2. Skip optional number of arguments
-            parser.parse_brackets()
+            args, end = parsed_usage
+            output.append(content[i : match.start()])
+            output.append(self._expand_usage(command, args))
+            i = search_pos = end
+
+        output.append(content[i:])
+        return "".join(output)
+
+    def _expand_usage(self, command: Command, args: List[str]) -> str:
+        """Returns the fully expanded text of a single command usage."""
+        key = (command.name, tuple(args))
+        expansion = self._expansions.get(key)
+        if expansion is None:
+            if key in self._in_progress or (
+                len(self._in_progress) >= _MAX_EXPANSION_DEPTH
+            ):
+                raise _ExpansionAbortedError()
+            self._in_progress.add(key)
+            try:
+                expansion = self.expand(command.expand(args))
+            finally:
+                self._in_progress.remove(key)
+            self._expansions[key] = expansion
+        return expansion
 
-            # 3. Skip optional default value
-            parser.parse_brackets()
 
-            # 4. Skip over the main definition body.
-            if parser.parse_braces() is None:
-                i = start_index + len(found_command)
-                continue
+def _order_by_dependency(commands: List[Command]) -> Optional[List[Command]]:
+    """Orders commands so each one precedes the commands its definition uses.
 
-        # Move the main index to the position after the parsed definition.
-        i = parser.pos
+    Replacing usages in this order means that an expansion only ever introduces
+    usages of commands that are still to be replaced. Wherever the dependencies
+    allow it, commands keep their definition order, which decides the result
+    when one usage directly precedes another (e.g. `\\b\\a` where `\\a` is
+    `y`).
 
-    return "".join(output)
+    Args:
+        commands: The parsed commands.
+
+    Returns:
+        The ordered commands, or None if the definitions are cyclic.
+    """
+    num_commands = len(commands)
+    # uses[i] lists the indices of the commands used in commands[i].definition.
+    uses = [
+        [
+            j
+            for j, other in enumerate(commands)
+            if other.usage_pattern.search(command.definition)
+        ]
+        for command in commands
+    ]
+    num_users = [0] * num_commands
+    for used in uses:
+        for j in used:
+            num_users[j] += 1
+
+    # The earliest defined command that is ready is always taken next.
+    ready = [i for i in range(num_commands) if num_users[i] == 0]
+    ordered = []
+    while ready:
+        i = heapq.heappop(ready)
+        ordered.append(commands[i])
+        for j in uses[i]:
+            num_users[j] -= 1
+            if num_users[j] == 0:
+                heapq.heappush(ready, j)
+
+    if len(ordered) < num_commands:
+        return None
+    return ordered
+
+
+def _expand_iteratively(content: str, commands: List[Command]) -> str:
+    """Replaces the usages of each command in turn until nothing changes.
+
+    Every pass retries every command, since a usage whose arguments could not
+    be parsed may become parseable once another command has been expanded.
+
+    Args:
+        content: The string to expand, without command definitions.
+        commands: The parsed commands.
+
+    Returns:
+        The expanded content.
+    """
+    max_iterations = 10  # A safeguard against potential infinite loops.
+    for _ in range(max_iterations):
+        previous_content = content
+        for command in commands:
+            content = replace_command_usages(content, command)
+
+        # If a full pass results in no changes, we're done.
+        if content == previous_content:
+            break
+    return content
 
 
 def inline_custom_commands(content: str) -> str:
@@ -522,8 +775,10 @@ def inline_custom_commands(content: str) -> str:
     iteratively replaces all usages of the custom commands with their
     corresponding definitions.
 
-    The process is iterative to handle nested commands, where one custom
-    command is defined in terms of another.
+    Nested commands, where one custom command is defined in terms of another,
+    are handled by expanding each command before the commands it uses. If a
+    name is defined more than once or the definitions are cyclic, the
+    replacement is instead repeated iteratively.
 
     Args:
         content: The LaTeX content as a string.
@@ -533,22 +788,47 @@ def inline_custom_commands(content: str) -> str:
         removed.
     """
     # First, find all command definitions in the original content.
-    commands = find_and_parse_commands(content)
+    commands, spans = _find_command_definitions(content)
     if not commands:
         return content
 
     # Then, remove the \newcommand definitions from the content to get a
-    # clean slate for replacements.
-    content_no_defs = remove_custom_definitions(content)
-
-    max_iterations = 10  # A safeguard against potential infinite loops.
-    for _ in range(max_iterations):
-        previous_content = content_no_defs
-        for command in commands:
-            content_no_defs = replace_command_usages(content_no_defs, command)
-
-        # If a full pass results in no changes, we're done.
-        if content_no_defs == previous_content:
-            break
+    # clean slate for replacements. Their ranges are already known, so the
+    # content does not need to be parsed again.
+    content_no_defs = _remove_spans(content, spans)
+
+    # A name that is defined more than once is left to the iterative
+    # expansion, where the definitions are tried in the order they appear.
+    if len({command.name for command in commands}) == len(commands):
+        ordered_commands = _order_by_dependency(commands)
+    else:
+        ordered_commands = None
+    if ordered_commands is not None:
+        expander = _OnePassExpander(commands)
+        if expander.is_supported():
+            try:
+                expanded = expander.expand(content_no_defs)
+            except _ExpansionAbortedError:
+                # An expansion reproduced its own usage (e.g. `\a{\a}` where
+                # `\a` is `#1{#1}`), which is left to the iteration cap.
+                expanded = None
+        else:
+            # Otherwise, every command is expanded before the commands its
+            # definition uses, so a single pass expands all nested usages.
+            expanded = content_no_defs
+            for command in ordered_commands:
+                expanded = replace_command_usages(expanded, command)
+
+        # Neither single pass retries a usage whose arguments only appear once
+        # a later usage has expanded (e.g. `\foo\bar` where `\bar` expands to
+        # `{x}`), so if any usage is left the pass is discarded.
+        if (
+            expanded is not None
+            and expander.usage_pattern.search(expanded) is None
+        ):
+            return expanded.strip()
 
-    return content_no_defs.strip()
+    # A name is defined more than once, the definitions refer to each other
+    # cyclically, or a single pass left a usage unexpanded, so fall back to
+    # expanding iteratively.
+    return _expand_iteratively(content_no_defs, commands).strip()
@@ -74,6 +74,7 @@ class LatexParserTest(unittest.TestCase):
             "simple": ("#1#2#3{xyz}", "#1#2#3", 6),
             "no_parameter": ("{xyz}", "", 0),
             "no_braces": ("#1#2#3", None, 0),
+            "escaped_brace": (r"#1\{#2{xyz}", r"#1\{#2", 6),
         }
         for name, (content, expected_result, expected_pos) in test_cases.items():
             with self.subTest(name=name):
@@ -132,6 +133,14 @@ class LatexInlineCommandTest(unittest.TestCase):
                 r"\newcommand{\commandb}{B stuff} \newcommand{\commanda}{A stuff with \commandb} Use it: \commanda.",
                 r"Use it: A stuff with B stuff.",
             ),
+            "chained_definitions": (
+                r"\newcommand{\cc}{C} \newcommand{\bb}{B\cc} \newcommand{\aa}{A\bb} Use it: \aa.",
+                r"Use it: ABC.",
+            ),
+            "definition_uses_command_without_its_args": (
+                r"\newcommand{\strong}{\bold} \newcommand{\bold}[1]{\textbf{#1}} \strong{x}",
+                r"\textbf{x}",
+            ),
             "command_with_star_and_usage": (
                 r"\newcommand*{\eg}{{\it e.g.}\@\xspace} This is an example, \eg, of usage.",
                 r"This is an example, {\it e.g.}\@\xspace, of usage.",
@@ -163,7 +172,62 @@ class LatexInlineCommandTest(unittest.TestCase):
             "def_style_with_single_non_letter_symbol": (
                 r"\def\1{\mathbf{1}} \1 is in bold",
                 r"\mathbf{1} is in bold",
-            )
+            ),
+            "argument_containing_placeholder_text": (
+                r"\newcommand{\pair}[2]{(#1, #2)} \pair{\#2}{b}",
+                r"(\#2, b)",
+            ),
+            "non_letter_command_followed_by_text": (
+                r"\def\1{\mathbf{1}} \1x and \12",
+                r"\mathbf{1}x and \mathbf{1}2",
+            ),
+            "def_keyword_is_prefix_of_another": (
+                r"\newcommand{\R}{\mathbb{R}} \default{x} and \R",
+                r"\default{x} and \mathbb{R}",
+            ),
+            "argument_from_later_expansion": (
+                r"\newcommand{\foo}[1]{<#1>}\newcommand{\bar}{{x}}\foo\bar",
+                r"<x>",
+            ),
+            "argument_from_later_expansion_defined_first": (
+                r"\newcommand{\bar}{{x}}\newcommand{\foo}[1]{<#1>}\foo\bar",
+                r"<x>",
+            ),
+            "argument_from_later_expansion_in_dependency_order": (
+                r"\newcommand{\strong}{\bold}\newcommand{\bold}[1]{[#1]}"
+                r"\newcommand{\other}{\arg}\newcommand{\arg}{{x}}\bold\arg",
+                r"[x]",
+            ),
+            "cyclic_definitions_with_argument_from_later_expansion": (
+                r"\newcommand{\loop}{\loop}\newcommand{\wrap}[1]{<#1>}"
+                r"\newcommand{\arg}{{x}}\wrap\arg",
+                r"<x>",
+            ),
+            "alias_of_command_with_optional_argument": (
+                r"\newcommand{\vect}[1][x]{\mathbf{#1}}\newcommand{\vv}{\vect}"
+                r"$\vv[y]$",
+                r"$\mathbf{y}$",
+            ),
+            "alias_of_norm_with_optional_argument": (
+                r"\newcommand{\norm}[1][\cdot]{\lVert #1 \rVert}"
+                r"\newcommand{\N}{\norm}\N[v]",
+                r"\lVert v \rVert",
+            ),
+            "independent_commands_keep_definition_order": (
+                r"\newcommand{\b}{B}\newcommand{\bb}{\b}\newcommand{\a}{y}"
+                r"\newcommand{\vect}[1][x]{V#1}\newcommand{\vv}{\vect}"
+                r"\vv[z] \b\a",
+                r"Vz By",
+            ),
+            "command_defined_twice": (
+                r"\newcommand{\x}{one}\newcommand{\y}{\x}"
+                r"\newcommand{\x}{two}\y",
+                r"two",
+            ),
+            "usage_reproduced_by_its_own_expansion": (
+                r"\newcommand{\a}[1]{#1{#1}}\a{\a}",
+                r"\a{\a}",
+            ),
         }
 
         for name, (content, expected) in test_cases.items():
@@ -13,27 +13,91 @@
 # limitations under the License.
 # ==============================================================================
 
+import gzip
 import io
 import os
 import re
 import tarfile
 import warnings
+import zlib
+from typing import Callable, Dict, Optional, Tuple
 from import_pipeline import latex_inline_command
 
 PREFERRED_MAIN_FILE_NAMES = ["main.tex", "ms.tex"]
 
-
-def extract_tar_gz(source_bytes: bytes, destination_path: str):
+_DOCUMENTCLASS_MARKER = rb"\documentclass"
+# \documentclass must precede everything but comments and a few preamble-only
+# commands, so only the start of each candidate file is searched for it.
+_DOCUMENTCLASS_SEARCH_BYTES = 64 * 1024
+
+# Buffer size used when copying extracted members to disk (tarfile's default
+# is 16 KiB).
+_TAR_COPY_BUFFER_SIZE = 2 * 1024 * 1024
+
+# Comments are removed in two forms:
+# 1. Lines that are *only* comments (with optional leading whitespace) are
+#    removed entirely, including their newline. `^\s*` may also consume blank
+#    lines directly above the comment.
+# 2. Comments after other text on a line are removed up to, but not including,
+#    the newline.
+# `(?<!\\)%` is a negative look-behind for '\' such that we only match '%'
+# that isn't escaped.
+_COMMENT_LINE_REGEX = r"^\s*(?<!\\)%[^\n]*\n"
+_INLINE_COMMENT_REGEX = r"(?<!\\)%[^\n]*"
+_COMMENT_PATTERN = re.compile(
+    f"{_COMMENT_LINE_REGEX}|{_INLINE_COMMENT_REGEX}", re.MULTILINE
+)
+
+# Matches every token inline_tex_files acts on, so each file is scanned once:
+# comments, and \input{...}, \include{...} or \bibliography{...} with the
+# argument (up to the first '}' on the same line) and a directly following
+# newline captured. Comments are tried first so that commented-out commands are
+# never expanded, even when comments are kept.
+_TEX_TOKEN_PATTERN = re.compile(
+    f"{_COMMENT_LINE_REGEX}|{_INLINE_COMMENT_REGEX}"
+    r"|\\(?P<command>input|include|bibliography)\{(?P<argument>[^}\n]*)\}"
+    r"(?P<newline>\n?)",
+    re.MULTILINE,
+)
+
+
+def extract_tar_gz(
+    source_bytes: bytes,
+    destination_path: str,
+    name_filter: Optional[Callable[[str], bool]] = None,
+):
     """
     Unpacks a .tar.gz file from bytes into a destination directory.
 
     Args:
         source_bytes (bytes): The byte content of the .tar.gz file.
         destination_path (str): The path to the directory where contents will be extracted.
+        name_filter (Callable[[str], bool], optional): If given, only members whose
+            name it returns True for are extracted.
     """
-    with io.BytesIO(source_bytes) as byte_stream:
-        with tarfile.open(fileobj=byte_stream, mode="r:gz") as tar:
-            tar.extractall(path=destination_path)
+    # The archive is already in memory, so decompress it in one call instead
+    # of streaming it through gzip in small blocks.
+    try:
+        tar_bytes = gzip.decompress(source_bytes)
+    except (OSError, EOFError, zlib.error) as e:
+        raise tarfile.ReadError("not a gzip file") from e
+
+    with io.BytesIO(tar_bytes) as byte_stream:
+        with tarfile.open(
+            fileobj=byte_stream, mode="r:", copybufsize=_TAR_COPY_BUFFER_SIZE
+        ) as tar:
+            members = tar.getmembers()
+            if name_filter is not None:
+                members = [m for m in members if name_filter(m.name)]
+            for member in members:
+                # The "data" filter rejects members that would be written
+                # outside of destination_path, e.g. absolute paths or links
+                # escaping it. Such a member is skipped rather than failing
+                # the whole extraction.
+                try:
+                    tar.extract(member, path=destination_path, filter="data")
+                except tarfile.FilterError as e:
+                    warnings.warn(f"Skipping {member.name} in extract_tar_gz: {e}")
 
 
 def find_main_tex_file(source_path: str) -> str:
@@ -57,10 +121,11 @@ def find_main_tex_file(source_path: str) -> str:
             if file.endswith(".tex"):
                 full_path = os.path.join(root, file)
                 try:
-                    with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
-                        # Read file to check for \documentclass
-                        content = f.read()
-                        if r"\documentclass" in content:
+                    # Check for \documentclass on the raw bytes; the marker is
+                    # ASCII, so there is no need to decode the file.
+                    with open(full_path, "rb") as f:
+                        head = f.read(_DOCUMENTCLASS_SEARCH_BYTES)
+                        if _DOCUMENTCLASS_MARKER in head:
                             valid_main_paths.append(full_path)
                 except Exception:
                     # Ignore files that can't be opened or read
@@ -84,6 +149,40 @@ def find_main_tex_file(source_path: str) -> str:
     return valid_main_paths[0]
 
 
+def _read_bibliography(bib_name: str, directory: str) -> str:
+    """Returns the content of the bibliography file for a \\bibliography command.
+
+    Prefers the compiled `<bib_name>.bbl`, then `<bib_name>.bib`, then any .bbl
+    file and finally any .bib file in `directory`.
+
+    Raises:
+        FileNotFoundError: If no .bbl or .bib file can be found.
+    """
+    # The compiled bibliography file has a .bbl extension
+    bbl_file_path = os.path.normpath(os.path.join(directory, f"{bib_name}.bbl"))
+    bib_file_path = os.path.normpath(os.path.join(directory, f"{bib_name}.bib"))
+
+    if os.path.exists(bbl_file_path):
+        final_path = bbl_file_path
+    elif os.path.exists(bib_file_path):
+        final_path = bib_file_path
+    else:
+        # First, look for any .bbl file
+        bbl_files = [f for f in os.listdir(directory) if f.endswith(".bbl")]
+        if bbl_files:
+            final_path = os.path.join(directory, bbl_files[0])
+        else:
+            # If no .bbl, look for any .bib file
+            bib_files = [f for f in os.listdir(directory) if f.endswith(".bib")]
+            if bib_files:
+                final_path = os.path.join(directory, bib_files[0])
+            else:
+                raise FileNotFoundError(f"No .bbl or .bib files found in {directory}")
+
+    with open(final_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
 def inline_tex_files(
     main_file_path: str,
     max_depth=10,
@@ -106,7 +205,12 @@ def inline_tex_files(
         A string with all commands replaced by their file content.
     """
     return _inline_tex_files(
-        main_file_path, main_file_path, max_depth, remove_comments, inline_commands
+        main_file_path,
+        main_file_path,
+        max_depth,
+        remove_comments,
+        inline_commands,
+        inlined_files={},
     )
 
 
@@ -116,7 +220,17 @@ def _inline_tex_files(
     max_depth=10,
     remove_comments=False,
     inline_commands=False,
+    inlined_files: Optional[Dict[Tuple[str, int], str]] = None,
 ) -> str:
+    """Inlines a single file; see inline_tex_files.
+
+    `inlined_files` caches the result for each (included path, remaining depth)
+    during one top-level call, so a file that is included from several places
+    is only read and processed once.
+    """
+    if inlined_files is None:
+        inlined_files = {}
+
     if max_depth <= 0:
         warnings.warn(f"Reached max recursion depth while processing {main_file_path}.")
         return ""  # Stop recursion
@@ -130,110 +244,56 @@ def _inline_tex_files(
     except FileNotFoundError as e:
         warnings.warn(f"File {path_to_read} not found in inline_tex_files: {e}")
 
-    # --- Step 1: Inline \input and \include ---
-    # Regex explanation:
-    # '\\': matches '\'
-    # '(?:input|include)': non-capturing group that matches either 'input' or 'include'
-    # '\{(.*?)\}': Capturing group that matches any character except \n (.) between 0 and unlimited types,
-    #   lazily (*?), between { and }.
-    input_pattern = re.compile(r"\\(?:input|include)\{(.*?)\}")
+    def token_replacer(match):
+        command = match.group("command")
+        if command is None:
+            # A comment: either a whole comment line (including its newline and
+            # any blank lines before it) or the trailing comment on a line.
+            return "" if remove_comments else match.group(0)
+
+        if command == "bibliography":
+            bib_content = _read_bibliography(match.group("argument"), path_to_read_dir)
+            # The newline after \bibliography{...} is stripped together with the
+            # bibliography, so that a comment on its last line is removed as a
+            # whole line, as if the bibliography were part of this file.
+            bib_content += match.group("newline")
+            if remove_comments:
+                line_start = content.rfind("\n", 0, match.start()) + 1
+                line_prefix = content[line_start : match.start()]
+                if line_prefix.strip():
+                    # \bibliography{...} follows other text on its line, so the
+                    # bibliography's first line continues that line: a comment
+                    # there is only removed up to its newline.
+                    bib_content = _COMMENT_PATTERN.sub("", line_prefix + bib_content)
+                    bib_content = bib_content[len(line_prefix) :]
+                else:
+                    bib_content = _COMMENT_PATTERN.sub("", bib_content)
+            return bib_content
 
-    def input_replacer(match):
-        relative_path = match.group(1)
+        relative_path = match.group("argument")
         # Try adding the .tex extension; if it doesn't exist, the next recursive run of inline_text_files
         # will raise the error.
         if not relative_path.endswith(".tex"):
             relative_path += ".tex"
 
         included_file_path = os.path.normpath(os.path.join(base_dir, relative_path))
-        # Pass flags in recursive call
-        return _inline_tex_files(
-            main_file_path,
-            included_file_path,
-            max_depth - 1,
-            remove_comments,
-            inline_commands,
-        )
-
-    # Swaps in the latex file content for the matches
-    inlined_content = input_pattern.sub(input_replacer, content)
-
-    # --- Step 2: Inline \bibliography ---
-    # Regex explanation:
-    # '\\bibliography': matches this exact string
-    # '\{(.*?)\}': Capturing group that matches any character except \n (.) between 0 and unlimited types,
-    #   lazily (*?), between { and }.
-    bib_pattern = re.compile(r"\\bibliography\{(.*?)\}")
-
-    def bib_replacer(match):
-        bib_name = match.group(1)
-        # The compiled bibliography file has a .bbl extension
-        bbl_file_path = os.path.normpath(
-            os.path.join(path_to_read_dir, f"{bib_name}.bbl")
-        )
-        bib_file_path = os.path.normpath(
-            os.path.join(path_to_read_dir, f"{bib_name}.bib")
-        )
-
-        if os.path.exists(bbl_file_path):
-            final_path = bbl_file_path
-        elif os.path.exists(bib_file_path):
-            final_path = bib_file_path
-        else:
-            try:
-                # First, look for any .bbl file
-                bbl_files = [
-                    f for f in os.listdir(path_to_read_dir) if f.endswith(".bbl")
-                ]
-                if bbl_files:
-                    final_path = os.path.join(path_to_read_dir, bbl_files[0])
-                else:
-                    # If no .bbl, look for any .bib file
-                    bib_files = [
-                        f for f in os.listdir(path_to_read_dir) if f.endswith(".bib")
-                    ]
-                    if bib_files:
-                        final_path = os.path.join(path_to_read_dir, bib_files[0])
-                    else:
-                        raise FileNotFoundError(
-                            f"No .bbl or .bib files found in {path_to_read_dir}"
-                        )
-            except FileNotFoundError:
-                raise
-
-        try:
-            with open(final_path, "r", encoding="utf-8", errors="ignore") as f:
-                return f.read()
-        except FileNotFoundError:
-            raise
-
-    final_content = bib_pattern.sub(bib_replacer, inlined_content)
-
-    # --- Step 3: Remove comments if requested ---
-    if remove_comments:
-        # This regex removes two types of comments in two stages:
-        # 1. First, remove lines that are *only* comments (with optional leading whitespace).
-        #    `^\s*(?<!\\)%.*?\n` matches from the start of a line (`^`), finds optional
-        #    whitespace (`\s*`), then a comment that isn't escaped (`(?<!\\)%`),
-        #    and consumes the rest of the line including the newline (`.*?\n`).
-        #    This removes the entire line.
-        #
-        # Detailed regex explanations:
-        #   (?<!\\)%: This is negative look-behind for '\' such that we match '%' that isn't preceded by '\'
-        #   .*?\n: Matches any character except \n one or multiple times (lazy), ending with \n
-        content_no_full_line_comments = re.sub(
-            r"^\s*(?<!\\)%.*?\n", "", final_content, flags=re.MULTILINE
-        )
-
-        # 2. Second, remove inline comments from the remaining lines.
-        #    `(?<!\\)%.*?$` (see previous comment for detailed explanation) matches a comment that isn't
-        #    escaped and goes to the end of the line (`$`). This removes the comment but leaves the
-        #    rest of the line and its original newline character intact.
-        final_content = re.sub(
-            r"(?<!\\)%.*?$", "", content_no_full_line_comments, flags=re.MULTILINE
-        )
-
-    # --- Step 4: Inline custom commands if requested ---
+        cache_key = (included_file_path, max_depth - 1)
+        if cache_key not in inlined_files:
+            # Pass flags in recursive call
+            inlined_files[cache_key] = _inline_tex_files(
+                main_file_path,
+                included_file_path,
+                max_depth - 1,
+                remove_comments,
+                inline_commands,
+                inlined_files,
+            )
+        return inlined_files[cache_key] + match.group("newline")
+
+    # --- Step 1: Inline files and remove comments in a single sweep ---
+    final_content = _TEX_TOKEN_PATTERN.sub(token_replacer, content)
+
+    # --- Step 2: Inline custom commands if requested ---
     if inline_commands:
         final_content = latex_inline_command.inline_custom_commands(final_content)
 
@@ -27,6 +27,10 @@ if project_root not in sys.path:
 
 from import_pipeline import fetch_utils, latex_utils
 
+# Only these files are needed to find and inline the main .tex file, so figures
+# and other assets are not extracted.
+LATEX_SOURCE_EXTENSIONS = (".tex", ".bbl", ".bib", ".sty", ".cls", ".clo")
+
 
 def print_dir_structure(startpath):
     """Prints the directory structure."""
@@ -74,7 +78,11 @@ def main():
 
         # 2. Extract the .tar.gz file
         print(f"Extracting source to temporary directory: {temp_dir}")
-        latex_utils.extract_tar_gz(source_bytes, temp_dir)
+        latex_utils.extract_tar_gz(
+            source_bytes,
+            temp_dir,
+            name_filter=lambda name: name.endswith(LATEX_SOURCE_EXTENSIONS),
+        )
         print("Extraction complete.")
 
         # Print the directory structure
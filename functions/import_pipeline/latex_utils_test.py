@@ -14,7 +14,8 @@
 # ==============================================================================
 
 import unittest
-from unittest.mock import patch, MagicMock, call, mock_open
+from unittest.mock import patch
+import gzip
 import os
 import shutil
 import tempfile
@@ -32,6 +33,23 @@ class LatexUtilsTest(unittest.TestCase):
         # Clean up the temporary directory
         shutil.rmtree(self.test_dir)
 
+    def _reset_dir(self):
+        """Removes everything inside test_dir, keeping the directory itself."""
+        with os.scandir(self.test_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+
+    def _write_fixture(self, tree):
+        """Writes `tree`, a dict of path (relative to test_dir) to file content."""
+        for relative_path, content in tree.items():
+            full_path = os.path.join(self.test_dir, relative_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w") as f:
+                f.write(content)
+
     def test_extract_tar_gz(self):
         """Tests extraction of a gzipped tar archive from bytes."""
 
@@ -53,7 +71,12 @@ class LatexUtilsTest(unittest.TestCase):
             # Call the function to extract the bytes
             destination_path = os.path.join(self.test_dir, "extracted_success")
             os.makedirs(destination_path)
-            latex_utils.extract_tar_gz(tar_bytes, destination_path)
+            with patch.object(
+                latex_utils.gzip, "decompress", wraps=gzip.decompress
+            ) as mock_decompress:
+                latex_utils.extract_tar_gz(tar_bytes, destination_path)
+            # The whole archive is decompressed up front, in a single call.
+            mock_decompress.assert_called_once_with(tar_bytes)
 
             # Verify the file was extracted correctly
             extracted_file_path = os.path.join(destination_path, file_name)
@@ -61,6 +84,50 @@ class LatexUtilsTest(unittest.TestCase):
             with open(extracted_file_path, "rb") as f:
                 self.assertEqual(f.read(), file_content)
 
+        # --- Subtest for extracting only the members accepted by name_filter ---
+        with self.subTest(name="name_filter"):
+            tar_buffer = io.BytesIO()
+            with tarfile.open(fileobj=tar_buffer, mode="w:gz") as tar:
+                for member_name in ["test.txt", "paper/main.tex"]:
+                    tarinfo = tarfile.TarInfo(name=member_name)
+                    tarinfo.size = len(file_content)
+                    tar.addfile(tarinfo, io.BytesIO(file_content))
+
+            destination_path = os.path.join(self.test_dir, "extracted_filtered")
+            os.makedirs(destination_path)
+            latex_utils.extract_tar_gz(
+                tar_buffer.getvalue(),
+                destination_path,
+                name_filter=lambda name: name.endswith(".tex"),
+            )
+
+            self.assertTrue(
+                os.path.exists(os.path.join(destination_path, "paper", "main.tex"))
+            )
+            self.assertFalse(os.path.exists(os.path.join(destination_path, file_name)))
+
+        # --- Subtest for skipping members that escape the destination ---
+        with self.subTest(name="unsafe_link_skipped"):
+            tar_buffer = io.BytesIO()
+            with tarfile.open(fileobj=tar_buffer, mode="w:gz") as tar:
+                tarinfo = tarfile.TarInfo(name="escape")
+                tarinfo.type = tarfile.SYMTYPE
+                tarinfo.linkname = "/etc/passwd"
+                tar.addfile(tarinfo)
+                tarinfo = tarfile.TarInfo(name=file_name)
+                tarinfo.size = len(file_content)
+                tar.addfile(tarinfo, io.BytesIO(file_content))
+
+            destination_path = os.path.join(self.test_dir, "extracted_unsafe")
+            os.makedirs(destination_path)
+            with self.assertWarns(UserWarning):
+                latex_utils.extract_tar_gz(tar_buffer.getvalue(), destination_path)
+
+            self.assertFalse(
+                os.path.lexists(os.path.join(destination_path, "escape"))
+            )
+            self.assertTrue(os.path.exists(os.path.join(destination_path, file_name)))
+
         # --- Subtest for invalid file ---
         with self.subTest(name="invalid_file"):
             invalid_bytes = b"this is not a tar file"
@@ -118,40 +185,28 @@ class LatexUtilsTest(unittest.TestCase):
 
         for name, file_paths, content, expected in test_cases:
             with self.subTest(name=name):
-                # Setup: create fresh subdirectory for each subtest
-                sub_test_dir = os.path.join(self.test_dir, name)
-                os.makedirs(sub_test_dir, exist_ok=True)
-
-                # Write content to all specified files
-                for file_path in file_paths:
-                    full_path = os.path.join(sub_test_dir, file_path)
-                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
-                    with open(full_path, "w") as f:
-                        f.write(content)
+                # Setup: start each subtest from an empty test directory
+                self._reset_dir()
+                self._write_fixture({file_path: content for file_path in file_paths})
 
                 if isinstance(expected, type) and issubclass(expected, Exception):
                     with self.assertRaises(expected):
-                        latex_utils.find_main_tex_file(sub_test_dir)
+                        latex_utils.find_main_tex_file(self.test_dir)
                 else:
-                    result = latex_utils.find_main_tex_file(sub_test_dir)
-                    self.assertEqual(result, os.path.join(sub_test_dir, expected))
-
-                # Cleanup sub-directory
-                shutil.rmtree(sub_test_dir)
+                    result = latex_utils.find_main_tex_file(self.test_dir)
+                    self.assertEqual(result, os.path.join(self.test_dir, expected))
 
     def test_inline_tex_files(self):
         """Tests recursive inlining of .tex files."""
         # Setup common files for all subtests
-        include_dir = os.path.join(self.test_dir, "includes")
-        os.makedirs(include_dir)
-        with open(os.path.join(include_dir, "name.tex"), "w") as f:
-            f.write("Bob")
-        with open(os.path.join(self.test_dir, "part1.tex"), "w") as f:
-            f.write(r"Part1 \input{part2.tex} More1")
-        with open(os.path.join(self.test_dir, "part2.tex"), "w") as f:
-            f.write("Part2")
-        with open(os.path.join(self.test_dir, "my_bib.bbl"), "w") as f:
-            f.write(r"\bibitem{test} Test Citation.")
+        self._write_fixture(
+            {
+                "includes/name.tex": "Bob",
+                "part1.tex": r"Part1 \input{part2.tex} More1",
+                "part2.tex": "Part2",
+                "my_bib.bbl": r"\bibitem{test} Test Citation.",
+            }
+        )
 
         test_cases = {
             "basic_inlining": (
@@ -167,13 +222,16 @@ class LatexUtilsTest(unittest.TestCase):
                 r"Some text. \bibitem{test} Test Citation.",
             ),
             "file_not_found": (r"Hello \input{nonexistent} World", "Hello  World"),
+            "commented_out_input": (
+                "Text % \\input{part2}\nMore \\input{part2}",
+                "Text % \\input{part2}\nMore Part2",
+            ),
         }
 
         for name, (content, expected) in test_cases.items():
             with self.subTest(name=name):
+                self._write_fixture({"main.tex": content})
                 main_file_path = os.path.join(self.test_dir, "main.tex")
-                with open(main_file_path, "w") as f:
-                    f.write(content)
 
                 result = latex_utils.inline_tex_files(main_file_path)
                 self.assertEqual(result, expected)
@@ -197,8 +255,7 @@ class LatexUtilsTest(unittest.TestCase):
             r"Final line."
         )
 
-        with open(main_file_path, "w") as f:
-            f.write(content)
+        self._write_fixture({"main_comments.tex": content})
 
         with self.subTest(name="keep_comments_explicit"):
             result = latex_utils.inline_tex_files(main_file_path, remove_comments=False)
@@ -208,29 +265,75 @@ class LatexUtilsTest(unittest.TestCase):
             result = latex_utils.inline_tex_files(main_file_path, remove_comments=True)
             self.assertEqual(result, expected_without_comments)
 
+    def test_inline_tex_files_with_comment_removal_across_files(self):
+        """Tests comment removal where comments meet the end of an inlined file."""
+        self._write_fixture(
+            {
+                "ends_in_comment.tex": "x\n% c",
+                "multiline.tex": "x\ny",
+                "ends_in_comment.bbl": "x\n% c",
+                "starts_with_comment.bbl": "% c\nx",
+            }
+        )
+
+        test_cases = {
+            # Included files are stripped on their own, so the comment line is
+            # removed but the newline after \input is kept.
+            "input_ending_in_comment": (
+                "a\n\\input{ends_in_comment}\nY",
+                "a\nx\n\nY",
+            ),
+            # A bibliography is stripped together with the newline after it, so
+            # its last comment line is removed as a whole line.
+            "bibliography_ending_in_comment": (
+                "a\n\\bibliography{ends_in_comment}\nY",
+                "a\nx\nY",
+            ),
+            # A bibliography after other text on its line continues that line, so
+            # a comment on its first line is removed up to, but not including,
+            # the newline.
+            "bibliography_mid_line_starting_with_comment": (
+                "a \\bibliography{starts_with_comment}\nY",
+                "a \nx\nY",
+            ),
+            # At the start of a line, its first comment line is removed whole.
+            "bibliography_starting_with_comment": (
+                "a\n\\bibliography{starts_with_comment}\nY",
+                "a\nx\nY",
+            ),
+            # A commented-out \input is removed with the comment and never read.
+            "commented_out_input": (
+                "a\n% \\input{multiline}\nY",
+                "a\nY",
+            ),
+        }
+
+        for name, (content, expected) in test_cases.items():
+            with self.subTest(name=name):
+                self._write_fixture({"main.tex": content})
+                main_file_path = os.path.join(self.test_dir, "main.tex")
+
+                result = latex_utils.inline_tex_files(
+                    main_file_path, remove_comments=True
+                )
+                self.assertEqual(result, expected)
+
     def test_inline_tex_files_nested_with_subdirs(self):
         """Tests that nested includes with relative paths in subdirectories work correctly."""
         # Create the directory structure:
         # /test_dir/main.tex
         # /test_dir/sub/part1.tex
         # /test_dir/sub/part2.tex
-        sub_dir = os.path.join(self.test_dir, "sub")
-        os.makedirs(sub_dir)
-
+        self._write_fixture(
+            {
+                # main.tex includes a file from the 'sub' directory
+                "main.tex": r"Main start \input{sub/part1.tex} Main end",
+                # part1.tex includes another file directory
+                "sub/part1.tex": r"Part1 start \input{sub/part2.tex} Part1 end",
+                "sub/part2.tex": "final content",
+            }
+        )
         main_file_path = os.path.join(self.test_dir, "main.tex")
-        part1_path = os.path.join(sub_dir, "part1.tex")
-        part2_path = os.path.join(sub_dir, "part2.tex")
-
-        with open(main_file_path, "w") as f:
-            # main.tex includes a file from the 'sub' directory
-            f.write(r"Main start \input{sub/part1.tex} Main end")
-
-        with open(part1_path, "w") as f:
-            # part1.tex includes another file directory
-            f.write(r"Part1 start \input{sub/part2.tex} Part1 end")
-
-        with open(part2_path, "w") as f:
-            f.write("final content")
 
         # The current implementation will fail here because it will look for
         # 'part2.tex' in self.test_dir, not in self.test_dir/sub.
@@ -238,18 +341,35 @@ class LatexUtilsTest(unittest.TestCase):
         expected = "Main start Part1 start final content Part1 end Main end"
         self.assertEqual(result, expected)
 
+    def test_inline_tex_files_reads_repeated_includes_once(self):
+        """Tests that a file included several times is only read once."""
+        self._write_fixture(
+            {
+                "main.tex": r"\input{sub/a} \input{sub/b}",
+                "sub/a.tex": r"A \input{macros}",
+                "sub/b.tex": r"B \input{macros}",
+                "macros.tex": "M",
+            }
+        )
+        main_file_path = os.path.join(self.test_dir, "main.tex")
+        macros_path = os.path.join(self.test_dir, "macros.tex")
+
+        with patch("builtins.open", wraps=open) as mock_open_file:
+            result = latex_utils.inline_tex_files(main_file_path)
+
+        self.assertEqual(result, "A M B M")
+        opened_paths = [c.args[0] for c in mock_open_file.call_args_list]
+        self.assertEqual(opened_paths.count(macros_path), 1)
+
     def test_inline_tex_files_bibliography_fallback(self):
         """Tests the fallback logic for finding bibliography files."""
         main_file_path = os.path.join(self.test_dir, "main.tex")
-        main_content = r"Some text. \bibliography{non_existent_bib}"
-        with open(main_file_path, "w") as f:
-            f.write(main_content)
+        self._write_fixture({"main.tex": r"Some text. \bibliography{non_existent_bib}"})
 
         # Subtest 1: Fallback to any .bbl file
         with self.subTest(name="fallback_to_bbl"):
             bbl_content = r"\bibitem{another_bbl} Another BBL Citation."
-            with open(os.path.join(self.test_dir, "another.bbl"), "w") as f:
-                f.write(bbl_content)
+            self._write_fixture({"another.bbl": bbl_content})
 
             result = latex_utils.inline_tex_files(main_file_path)
             self.assertEqual(result, f"Some text. {bbl_content}")
@@ -260,8 +380,7 @@ class LatexUtilsTest(unittest.TestCase):
         # Subtest 2: Fallback to any .bib file (when no .bbl exists)
         with self.subTest(name="fallback_to_bib"):
             bib_content = r"@article{another_bib, title={Another Bib}}"
-            with open(os.path.join(self.test_dir, "another.bib"), "w") as f:
-                f.write(bib_content)
+            self._write_fixture({"another.bib": bib_content})
 
             result = latex_utils.inline_tex_files(main_file_path)
             self.assertEqual(result, f"Some text. {bib_content}")
@@ -42,6 +42,32 @@ KATEX_SUBSTITUTIONS: List[KatexSubstitution] = [
     KatexSubstitution(pattern=re.compile(r"\\label\{[^}]*\}"), replacement=""),
 ]
 
+# All KATEX_SUBSTITUTIONS combined into one alternation, so they are applied in
+# a single pass. Each substitution is wrapped in a group named after its index.
+_KATEX_SUBSTITUTIONS_PATTERN = re.compile(
+    "|".join(
+        f"(?P<katex_{i}>{substitution.pattern.pattern})"
+        for i, substitution in enumerate(KATEX_SUBSTITUTIONS)
+    )
+)
+
+# Sections extracted by parse_lumi_import, keyed by their name in the output,
+# with the tags that start and end them.
+_SECTION_TAGS: Dict[str, Tuple[str, str]] = {
+    "title": (import_tags.L_TITLE_START, import_tags.L_TITLE_END),
+    "authors": (import_tags.L_AUTHORS_START, import_tags.L_AUTHORS_END),
+    "abstract": (import_tags.L_ABSTRACT_START, import_tags.L_ABSTRACT_END),
+    "content": (import_tags.L_CONTENT_START, import_tags.L_CONTENT_END),
+    "references": (import_tags.L_REFERENCES_START, import_tags.L_REFERENCES_END),
+    "footnotes": (import_tags.L_FOOTNOTES_START, import_tags.L_FOOTNOTES_END),
+}
+
+_EQUATION_PLACEHOLDER_PATTERN = re.compile(
+    f"({re.escape(EQUATION_PLACEHOLDER_PREFIX)}.*?{re.escape(PLACEHOLDER_SUFFIX)})"
+)
+_LUMI_TAG_PATTERN = re.compile(r"\[\[l-.*?\]\]")
+_DOUBLE_BRACKETS_PATTERN = re.compile(r"\[\[.*?\]\]")
+
 
 def parse_lumi_import(model_output_string: str) -> dict:
     """
@@ -58,30 +84,25 @@ def parse_lumi_import(model_output_string: str) -> dict:
     """
     parsed_data = {}
 
-    # Define the regex pattern for each section.
-    # re.DOTALL makes '.' match newlines, (.*?) makes it non-greedy.
-    patterns = {
-        "title": import_tags.L_TITLE_PATTERN,
-        "authors": import_tags.L_AUTHORS_PATTERN,
-        "abstract": import_tags.L_ABSTRACT_PATTERN,
-        "content": import_tags.L_CONTENT_PATTERN,
-        "references": import_tags.L_REFERENCES_PATTERN,
-        "footnotes": import_tags.L_FOOTNOTES_PATTERN,
-    }
-
-    for key, pattern in patterns.items():
-        match = re.search(pattern, model_output_string)
-        if match:
+    for key, (start_tag, end_tag) in _SECTION_TAGS.items():
+        # Equivalent to searching for `<start_tag>(.*?)<end_tag>` with re.DOTALL,
+        # but str.find skips straight to each tag.
+        start = model_output_string.find(start_tag)
+        if start == -1:
+            continue
+        start += len(start_tag)
+        end = model_output_string.find(end_tag, start)
+        if end != -1:
             # Strip leading/trailing whitespace from the captured content
-            parsed_data[key] = match.group(1).strip()
+            parsed_data[key] = model_output_string[start:end].strip()
         # If a section is not found, the key is simply omitted from the dictionary,
         # which is often preferred over an empty string default.
 
     # Use re.finditer to get match objects, which allows accessing specific groups
     references_list = []
     if "references" in parsed_data:
-        for match in re.finditer(
-            import_tags.L_REFERENCE_ITEM_PATTERN, parsed_data["references"]
+        for match in import_tags.L_REFERENCE_ITEM_PATTERN.finditer(
+            parsed_data["references"]
         ):
             ref_id = match.group(1)  # The N from reference-id-N
             ref_content = match.group(2).strip()  # The actual reference text
@@ -92,8 +113,8 @@ def parse_lumi_import(model_output_string: str) -> dict:
     # Use re.finditer to get match objects, which allows accessing specific groups
     footnotes_list = []
     if "footnotes" in parsed_data:
-        for match in re.finditer(
-            import_tags.L_FOOTNOTE_CONTENT_PATTERN, parsed_data["footnotes"]
+        for match in import_tags.L_FOOTNOTE_CONTENT_PATTERN.finditer(
+            parsed_data["footnotes"]
         ):
             footnote_id = match.group(1)  # The N from reference-id-N
             footnote_content = match.group(2).strip()  # The actual reference text
@@ -105,9 +126,15 @@ def parse_lumi_import(model_output_string: str) -> dict:
 
 def _apply_katex_substitutions(text: str) -> str:
     """Applies KaTeX substitutions to a string."""
-    for substitution in KATEX_SUBSTITUTIONS:
-        text = substitution.pattern.sub(substitution.replacement, text)
-    return text
+    # Every substituted command starts with a backslash.
+    if "\\" not in text:
+        return text
+
+    def replace_katex(match):
+        index = int(match.lastgroup.removeprefix("katex_"))
+        return match.expand(KATEX_SUBSTITUTIONS[index].replacement)
+
+    return _KATEX_SUBSTITUTIONS_PATTERN.sub(replace_katex, text)
 
 
 def _protect_math_expressions(markdown: str) -> Tuple[str, dict]:
@@ -174,15 +201,12 @@ def substitute_equation_placeholders(
     Returns:
         The string with placeholders replaced.
     """
-    equation_placeholder_pattern = re.compile(
-        f"({re.escape(EQUATION_PLACEHOLDER_PREFIX)}.*?{re.escape(PLACEHOLDER_SUFFIX)})"
-    )
 
     def replace_equation(match):
         placeholder = match.group(1)
         return placeholder_map.get(placeholder, "")
 
-    return equation_placeholder_pattern.sub(replace_equation, text)
+    return _EQUATION_PLACEHOLDER_PATTERN.sub(replace_equation, text)
 
 
 def markdown_to_html(markdown: str) -> str:
@@ -224,9 +248,12 @@ def postprocess_content_text(text: str, strip_double_brackets=False) -> str:
     """
     # (1) Swaps $ in for escaped \\$
     text = text.replace("\\$", "$")
+    # Both of the remaining steps only remove [[...]] tags.
+    if "[[" not in text:
+        return text
     # (2) Removing any remaining Lumi tags that were not correctly processed.
-    text = re.sub(r"\[\[l-.*?\]\]", "", text)
+    text = _LUMI_TAG_PATTERN.sub("", text)
     # (3) If the flag is set, remove remaining double square brackets, e.g. [[content]]
     if strip_double_brackets:
-        text = re.sub(r"\[\[.*?\]\]", "", text)
+        text = _DOUBLE_BRACKETS_PATTERN.sub("", text)
     return text
@@ -23,13 +23,22 @@ from shared.utils import get_unique_id
 from shared.constants import PERSONAL_SUMMARY_QUERY_NAME
 
 
-def get_personal_summary(doc: LumiDoc, past_papers: List[PaperData], api_key:str|None) -> LumiAnswer:
+def get_personal_summary(
+    doc: LumiDoc,
+    past_papers: List[PaperData],
+    api_key: str | None,
+    *,
+    now: int | None = None,
+) -> LumiAnswer:
     """
     Generates a personalized summary for a document.
 
     Args:
         doc (LumiDoc): The document to summarize.
         past_papers (List[PaperData]): A list of past papers for context.
+        api_key (str | None): The Gemini API key to use, if not the default.
+        now (int | None): The timestamp (in seconds) to record on the answer.
+            Defaults to the current time.
 
     Returns:
         LumiAnswer: The generated personalized summary, packaged as a LumiAnswer.
@@ -43,9 +52,9 @@ def get_personal_summary(doc: LumiDoc, past_papers: List[PaperData], api_key:str
         html_response, placeholder_map={}, strip_double_brackets=True
     )
 
-    response_content: List[LumiContent] = []
-    for section in response_sections:
-        response_content.extend(section.contents)
+    response_content: List[LumiContent] = [
+        content for section in response_sections for content in section.contents
+    ]
 
     # If parsing fails or returns no content, create a single raw span as a fallback.
     if not response_content:
@@ -64,5 +73,5 @@ def get_personal_summary(doc: LumiDoc, past_papers: List[PaperData], api_key:str
         id=get_unique_id(),
         request=request,
         response_content=response_content,
-        timestamp=int(time.time()),
+        timestamp=now if now is not None else int(time.time()),
     )
@@ -81,7 +81,7 @@ def main():
     print("Using a dummy document and empty past papers list for context...")
 
     print("Generating personal summary...")
-    personal_summary = get_personal_summary(doc, past_papers)
+    personal_summary = get_personal_summary(doc, past_papers, api_key=None)
 
     print("\n" + "="*20 + " RESULT " + "="*20)
     print("\nResponse:")
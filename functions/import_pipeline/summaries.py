@@ -18,6 +18,7 @@
 
 import json
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Type, Dict
 from pydantic import BaseModel
 
@@ -63,6 +64,10 @@ SPAN_SUMMARIES_DEFAULT_BATCH_SIZE = 500
 SECTION_SUMMARIES_DEFAULT_BATCH_SIZE = 50
 CONTENT_SUMMARIES_DEFAULT_BATCH_SIZE = 100
 
+# One worker per summary category, so all enabled categories call Gemini at
+# the same time.
+_SUMMARY_CATEGORY_WORKERS = 4
+
 # Shared prompt instructions
 _PROMPT_FORMATTING_INSTRUCTIONS = """You can use markdown for formatting, like <b>bold</b>. For any equations or variables, make sure to use $...$ for any inline math (including \\sqrt)."""
 _PROMPT_JSON_OUTPUT_INSTRUCTIONS = """Please return the list of items and their summaries as a list of JSON objects, each with two fields: id (string) and label (string). Please use double quotes around the key/values and single quotes within the strings."""
@@ -81,6 +86,11 @@ def _create_summary_span(raw_label: str) -> LumiSpan:
     )
 
 
+def _parse_label_to_summary(label: LabelSchema) -> LumiSummary:
+    """Converts a LabelSchema returned by Gemini into a LumiSummary."""
+    return LumiSummary(id=label.id, summary=_create_summary_span(label.label))
+
+
 def generate_lumi_summaries(
     document: LumiDoc,
     options: FetchLumiSummariesRequestOptions = FetchLumiSummariesRequestOptions(
@@ -90,26 +100,49 @@ def generate_lumi_summaries(
         include_abstract_excerpt=True,
     ),
 ) -> LumiSummaries:
-    """Generates Lumi summaries."""
+    """Generates Lumi summaries.
+
+    The enabled summary categories are independent Gemini calls, so they are
+    run concurrently and the total latency is that of the slowest category.
+    """
     lumi_summaries = LumiSummaries(
         section_summaries=[], content_summaries=[], span_summaries=[]
     )
 
-    if options.include_section_summaries:
-        section_summaries = generate_section_summaries(document)
-        lumi_summaries.section_summaries.extend(section_summaries)
+    # Nothing to request, so don't start the worker pool at all.
+    if not (
+        options.include_section_summaries
+        or options.include_content_summaries
+        or options.include_span_summaries
+        or (options.include_abstract_excerpt and document.abstract)
+    ):
+        return lumi_summaries
+
+    section_future = content_future = span_future = abstract_future = None
+    with ThreadPoolExecutor(max_workers=_SUMMARY_CATEGORY_WORKERS) as executor:
+        if options.include_section_summaries:
+            section_future = executor.submit(generate_section_summaries, document)
+
+        if options.include_content_summaries:
+            content_future = executor.submit(generate_content_summaries, document)
 
-    if options.include_content_summaries:
-        content_summaries = generate_content_summaries(document)
-        lumi_summaries.content_summaries.extend(content_summaries)
+        if options.include_span_summaries:
+            span_future = executor.submit(generate_span_summaries, document)
 
-    if options.include_span_summaries:
-        span_summaries = generate_span_summaries(document)
-        lumi_summaries.span_summaries.extend(span_summaries)
+        if options.include_abstract_excerpt and document.abstract:
+            abstract_future = executor.submit(_select_abstract_excerpt, document)
 
-    if options.include_abstract_excerpt and document.abstract:
-        abstract_excerpt_span_id = _select_abstract_excerpt(document)
-        lumi_summaries.abstract_excerpt_span_id = abstract_excerpt_span_id
+    if section_future:
+        lumi_summaries.section_summaries.extend(section_future.result())
+
+    if content_future:
+        lumi_summaries.content_summaries.extend(content_future.result())
+
+    if span_future:
+        lumi_summaries.span_summaries.extend(span_future.result())
+
+    if abstract_future:
+        lumi_summaries.abstract_excerpt_span_id = abstract_future.result()
 
     return lumi_summaries
 
@@ -154,17 +187,6 @@ def _get_text_from_content(content: LumiContent) -> str:
     return " ".join(span.text for span in spans)
 
 
-def _get_text_from_section(section: LumiSection) -> str:
-    """Gets the concatenated text from all spans within a LumiSection, including sub-sections."""
-    all_text = []
-    for content in section.contents:
-        all_text.append(_get_text_from_content(content))
-    if section.sub_sections:
-        for sub_section in section.sub_sections:
-            all_text.append(_get_text_from_section(sub_section))
-    return " ".join(all_text)
-
-
 # ------------------------------------------------------------------------------
 # Abstract Excerpt
 # ------------------------------------------------------------------------------
@@ -243,12 +265,9 @@ def generate_span_summaries(
             prompt, response_schema=list[LabelSchema]
         )
         if schema_labels:
-            # Convert from List[LabelSchema] to List[LumiSummary]
-            summaries = [
-                LumiSummary(id=sl.id, summary=_create_summary_span(sl.label))
-                for sl in schema_labels
-            ]
-            all_summaries.extend(summaries)
+            all_summaries.extend(
+                _parse_label_to_summary(label) for label in schema_labels
+            )
         else:
             print(f"Failed to parse JSON response for span summaries.")
             continue
@@ -263,15 +282,20 @@ def _get_all_sections_with_text(document: LumiDoc) -> List[Dict[str, str]]:
     """Recursively collects all sections and their text from a LumiDoc."""
     section_data = []
 
-    def _collect_recursive(sections: List[LumiSection]):
-        for section in sections:
-            section_data.append(
-                {"id": section.id, "text": _get_text_from_section(section)}
-            )
-            if section.sub_sections:
-                _collect_recursive(section.sub_sections)
-
-    _collect_recursive(document.sections)
+    def _collect_recursive(section: LumiSection) -> str:
+        # Reserve the parent's slot first so sections stay in document order,
+        # then build its text from the sub-section texts as they are
+        # collected, so each section is only walked once.
+        entry = {"id": section.id, "text": ""}
+        section_data.append(entry)
+        all_text = [_get_text_from_content(content) for content in section.contents]
+        for sub_section in section.sub_sections or []:
+            all_text.append(_collect_recursive(sub_section))
+        entry["text"] = " ".join(all_text)
+        return entry["text"]
+
+    for section in document.sections:
+        _collect_recursive(section)
     return section_data
 
 
@@ -280,7 +304,6 @@ def _generate_section_summaries_prompt(section_data: List[Dict[str, str]]) -> st
     section_strings = [
         "{{ id: {id}, text: {text}}}".format(id=s["id"], text=s["text"])
         for s in section_data
-        if len(s["text"]) > MIN_CHARACTER_LENGTH
     ]
     section_string = "\n".join(section_strings)
     prompt = f"""You will be given a section of a document! Your task is to summarize each section in 4-16 words, being as specific as possible. {_PROMPT_FORMATTING_INSTRUCTIONS}
@@ -298,7 +321,13 @@ def generate_section_summaries(
 ) -> List[LumiSummary]:
     """Generates section labels."""
     all_summaries: List[LumiSummary] = []
-    all_sections_data = _get_all_sections_with_text(document)
+    # Drop short sections before batching, so batches are filled with (and
+    # Gemini is only called for) sections worth summarizing.
+    all_sections_data = [
+        section_data
+        for section_data in _get_all_sections_with_text(document)
+        if len(section_data["text"]) > MIN_CHARACTER_LENGTH
+    ]
 
     for i in range(0, len(all_sections_data), batch_size):
         batch_data = all_sections_data[i : i + batch_size]
@@ -308,12 +337,9 @@ def generate_section_summaries(
         )
 
         if schema_labels:
-            # Convert from List[LabelSchema] to List[LumiSummary]
-            summaries = [
-                LumiSummary(id=sl.id, summary=_create_summary_span(sl.label))
-                for sl in schema_labels
-            ]
-            all_summaries.extend(summaries)
+            all_summaries.extend(
+                _parse_label_to_summary(label) for label in schema_labels
+            )
         else:
             print(f"Failed to parse JSON response for section summaries.")
             continue
@@ -346,7 +372,6 @@ def _get_generate_content_summaries_prompt(content_data: List[Dict[str, str]]) -
     content_strings = [
         "{{ id: {id}, text: {text}}}".format(id=c["id"], text=c["text"])
         for c in content_data
-        if len(c["text"]) > MIN_CHARACTER_LENGTH
     ]
     content_string = "\n".join(content_strings)
     prompt = f"""You will be given a list of content! Your task is to summarize each piece of content in 4-16 words, being as specific as possible. {_PROMPT_FORMATTING_INSTRUCTIONS}
@@ -366,7 +391,13 @@ def generate_content_summaries(
 ) -> List[LumiSummary]:
     """Generates content labels."""
     all_summaries: List[LumiSummary] = []
-    all_contents_data = _get_all_contents_with_text(document)
+    # Drop short contents before batching, so batches are filled with (and
+    # Gemini is only called for) contents worth summarizing.
+    all_contents_data = [
+        content_data
+        for content_data in _get_all_contents_with_text(document)
+        if len(content_data["text"]) > MIN_CHARACTER_LENGTH
+    ]
 
     for i in range(0, len(all_contents_data), batch_size):
         batch_data = all_contents_data[i : i + batch_size]
@@ -376,12 +407,9 @@ def generate_content_summaries(
         )
 
         if schema_labels:
-            # Convert from List[LabelSchema] to List[LumiSummary]
-            summaries = [
-                LumiSummary(id=sl.id, summary=_create_summary_span(sl.label))
-                for sl in schema_labels
-            ]
-            all_summaries.extend(summaries)
+            all_summaries.extend(
+                _parse_label_to_summary(label) for label in schema_labels
+            )
         else:
             print(f"Failed to parse JSON response for content summaries.")
             continue
@@ -21,10 +21,11 @@ from typing import List
 
 from import_pipeline.summaries import (
     generate_lumi_summaries,
+    generate_section_summaries,
+    generate_content_summaries,
     FetchLumiSummariesRequestOptions,
     _get_all_spans_from_doc,
     _get_text_from_content,
-    _get_text_from_section,
     _generate_span_summaries_prompt,
     _generate_section_summaries_prompt,
     _get_generate_content_summaries_prompt,
@@ -180,13 +181,43 @@ class SummariesTest(unittest.TestCase):
             self._reset_mocks(mock_call_predict_with_schema, mock_get_unique_id)
 
             options = FetchLumiSummariesRequestOptions() # All false
-            summaries = generate_lumi_summaries(self.mock_document, options)
+            with patch('import_pipeline.summaries.ThreadPoolExecutor') as mock_executor:
+                summaries = generate_lumi_summaries(self.mock_document, options)
+            mock_executor.assert_not_called()
             self.assertEqual(len(summaries.section_summaries), 0)
             self.assertEqual(len(summaries.content_summaries), 0)
             self.assertEqual(len(summaries.span_summaries), 0)
             mock_call_predict_with_schema.assert_not_called()
             self.assertIsNone(summaries.abstract_excerpt_span_id)
 
+    @patch('import_pipeline.summaries.get_unique_id', return_value='unique_span_id')
+    @patch('import_pipeline.summaries.gemini.call_predict_with_schema')
+    def test_generate_lumi_summaries_all_categories(self, mock_call_predict_with_schema, mock_get_unique_id):
+        section_prompt = _generate_section_summaries_prompt(_get_all_sections_with_text(self.mock_document))
+        content_prompt = _get_generate_content_summaries_prompt(_get_all_contents_with_text(self.mock_document))
+        span_prompt = _generate_span_summaries_prompt(_get_all_spans_from_doc(self.mock_document))
+        responses = {
+            section_prompt: [LabelSchema(id="sec1", label="Section summary")],
+            content_prompt: [LabelSchema(id="tc1", label="Content summary")],
+            span_prompt: [LabelSchema(id="s1a", label="Span summary")],
+        }
+
+        def fake_call_predict_with_schema(prompt, response_schema):
+            if response_schema is AbstractExcerptSchema:
+                return AbstractExcerptSchema(id="abs2")
+            return responses[prompt]
+
+        mock_call_predict_with_schema.side_effect = fake_call_predict_with_schema
+
+        # The default options include every category; they run concurrently.
+        summaries = generate_lumi_summaries(self.mock_document)
+
+        self.assertEqual(mock_call_predict_with_schema.call_count, 4)
+        self.assertEqual([s.id for s in summaries.section_summaries], ["sec1"])
+        self.assertEqual([s.id for s in summaries.content_summaries], ["tc1"])
+        self.assertEqual([s.id for s in summaries.span_summaries], ["s1a"])
+        self.assertEqual(summaries.abstract_excerpt_span_id, "abs2")
+
     @patch('import_pipeline.summaries.gemini.call_predict_with_schema')
     def test_generate_lumi_summaries_with_abstract_excerpt(self, mock_call_predict_with_schema):
         self._reset_mocks(mock_call_predict_with_schema)
@@ -208,4 +239,29 @@ class SummariesTest(unittest.TestCase):
         # Assert that the correct span ID was populated
         self.assertEqual(summaries.abstract_excerpt_span_id, expected_span_id)
         # Assert that the gemini call was made with the correct prompt
-        mock_call_predict_with_schema.assert_called_once_with(expected_prompt, response_schema=AbstractExcerptSchema)
\ No newline at end of file
+        mock_call_predict_with_schema.assert_called_once_with(expected_prompt, response_schema=AbstractExcerptSchema)
+
+    def test_get_all_sections_with_text_nested(self):
+        nested_section = LumiSection(id="sec1a", heading=Heading(heading_level=3, text="Nested"), contents=[self.mock_list_content1])
+        parent_section = LumiSection(id="sec1", heading=Heading(heading_level=2, text="Section One"), contents=[self.mock_text_content1], sub_sections=[nested_section])
+        document = LumiDoc(markdown="", sections=[parent_section, self.mock_section2], concepts=[])
+
+        section_data = _get_all_sections_with_text(document)
+
+        nested_text = _get_text_from_content(self.mock_list_content1)
+        expected_section_data = [
+            {"id": "sec1", "text": _get_text_from_content(self.mock_text_content1) + " " + nested_text},
+            {"id": "sec1a", "text": nested_text},
+            {"id": "sec2", "text": " ".join(_get_text_from_content(c) for c in self.mock_section2.contents)},
+        ]
+        self.assertEqual(section_data, expected_section_data)
+
+    @patch('import_pipeline.summaries.gemini.call_predict_with_schema')
+    def test_generate_summaries_skips_short_text(self, mock_call_predict_with_schema):
+        short_content = LumiContent(id="tc3", text_content=TextContent(tag_name="p", spans=[LumiSpan(id="s4a", text="Too short.", inner_tags=[])]))
+        short_section = LumiSection(id="sec3", heading=Heading(heading_level=2, text="Short"), contents=[short_content])
+        document = LumiDoc(markdown="", sections=[short_section], concepts=[])
+
+        self.assertEqual(generate_section_summaries(document), [])
+        self.assertEqual(generate_content_summaries(document), [])
+        mock_call_predict_with_schema.assert_not_called()
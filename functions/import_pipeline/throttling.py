@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import datetime
 from dataclasses import asdict
 from firebase_admin import firestore
 from firebase_functions import https_fn
@@ -22,15 +23,27 @@ from shared.types import ThrottleCollectionItem
 from shared.json_utils import convert_keys
 
 MAX_IMPORTS_PER_MINUTE = 5
+THROTTLE_WINDOW = datetime.timedelta(minutes=1)
+
+# The attempt record only varies by `succeeded`, so both possible payloads are
+# converted to their Firestore form once, keyed by that value.
+_THROTTLE_ITEM_PAYLOADS = {
+    succeeded: convert_keys(
+        asdict(ThrottleCollectionItem(timestamp=SERVER_TIMESTAMP, succeeded=succeeded)),
+        "snake_to_camel",
+    )
+    for succeeded in (True, False)
+}
 
 
 def check_throttle():
     """
     Checks if the number of import requests has exceeded the limit.
 
-    This function adds a document to the 'import_attempts' collection for each
-    request. It then queries the last 5 successful attempts to determine if the
-    rate limit of 5 requests per minute has been exceeded.
+    This function counts the successful attempts in the 'import_attempts'
+    collection from the last minute to determine if the rate limit of 5
+    requests per minute has been exceeded, then records the attempt (and
+    whether it succeeded) with a single write.
 
     Raises:
         https_fn.HttpsError: If the rate limit is exceeded, a
@@ -39,45 +52,30 @@ def check_throttle():
     db = firestore.client()
     collection_ref = db.collection(THROTTLE_COLLECTION_NAME)
 
-    # Write a new attempt record
-    throttle_item = ThrottleCollectionItem(timestamp=SERVER_TIMESTAMP, succeeded=False)
-    throttle_item_dict = convert_keys(asdict(throttle_item), "snake_to_camel")
-
-    _, new_doc_ref = collection_ref.add(throttle_item_dict)
-    new_doc = new_doc_ref.get()
-    current_timestamp = new_doc.get("timestamp")
+    # The stored record keeps the server timestamp; the window check uses the
+    # local clock so the new record doesn't have to be read back.
+    current_timestamp = datetime.datetime.now(datetime.timezone.utc)
 
-    # Query for the most recent MAX_IMPORTS_PER_MINUTE attempts
-    query = (
+    # Count the successful attempts within the window on the server, rather
+    # than streaming the most recent attempts and comparing timestamps here.
+    # Ordering by descending timestamp lets the query use the same
+    # (succeeded, timestamp DESC) index as the previous most-recent query.
+    window_start = current_timestamp - THROTTLE_WINDOW
+    count_query = (
         collection_ref.where(filter=FieldFilter("succeeded", "==", True))
+        .where(filter=FieldFilter("timestamp", ">=", window_start))
         .order_by("timestamp", direction=Query.DESCENDING)
-        .limit(MAX_IMPORTS_PER_MINUTE)
-        .stream()
+        .count()
     )
-    recent_attempts = list(query)
-
-    def _update_success():
-        throttle_item = ThrottleCollectionItem(
-            timestamp=SERVER_TIMESTAMP, succeeded=True
-        )
-        throttle_item_dict = convert_keys(asdict(throttle_item), "snake_to_camel")
-        new_doc_ref.update(throttle_item_dict)
-
-    if len(recent_attempts) < MAX_IMPORTS_PER_MINUTE:
-        # Not enough attempts to be throttled
-        _update_success()
-        return
+    recent_attempts_count = count_query.get()[0][0].value
 
-    oldest_recent_attempt = recent_attempts[MAX_IMPORTS_PER_MINUTE - 1]
-    oldest_recent_timestamp = oldest_recent_attempt.get("timestamp")
+    # Throttle if too many attempts have occurred within the last minute.
+    throttled = recent_attempts_count >= MAX_IMPORTS_PER_MINUTE
 
-    time_difference = current_timestamp - oldest_recent_timestamp
+    # Write the attempt record
+    collection_ref.document().set(dict(_THROTTLE_ITEM_PAYLOADS[not throttled]))
 
-    if time_difference.total_seconds() > 60:
-        _update_success()
-        return
-    else:
-        # Throttle since too many attempts have occurred within the last minute.
+    if throttled:
         raise https_fn.HttpsError(
             code=https_fn.FunctionsErrorCode.RESOURCE_EXHAUSTED,
             message="Too many import requests. Please try again in a minute.",
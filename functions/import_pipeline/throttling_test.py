@@ -17,7 +17,7 @@ import unittest
 from unittest.mock import MagicMock, patch
 
 from firebase_functions import https_fn
-from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP, Query
 
 
 # This patch must be applied before importing the function to be tested
@@ -27,32 +27,26 @@ with patch("firebase_admin.initialize_app"):
 
 class ThrottlingTest(unittest.TestCase):
 
-    @patch("import_pipeline.throttling.firestore")
-    def test_check_throttle_success_fewer_than_max_attempts(self, mock_firestore):
-        """
-        Tests the success scenario where there are fewer attempts than the limit.
-        """
-        # Arrange
+    def _mock_collection(self, mock_firestore, recent_attempts_count):
+        """Mocks the throttle collection, whose count query returns the given count."""
         mock_db = MagicMock()
         mock_firestore.client.return_value = mock_db
         mock_collection = MagicMock()
         mock_db.collection.return_value = mock_collection
 
-        # Mock the `add` call to return a reference
-        mock_doc_ref = MagicMock()
-        mock_collection.add.return_value = (None, mock_doc_ref)
-
-        # Mock the `get` call on the new document reference
-        mock_new_doc = MagicMock()
-        mock_new_doc.get.return_value = datetime.datetime.now(datetime.timezone.utc)
-        mock_doc_ref.get.return_value = mock_new_doc
-
-        # Mock the query stream to return 4 documents (less than the max)
-        mock_stream = [
-            MagicMock() for _ in range(throttling.MAX_IMPORTS_PER_MINUTE - 1)
+        mock_collection.where.return_value.where.return_value.order_by.return_value.count.return_value.get.return_value = [
+            [MagicMock(value=recent_attempts_count)]
         ]
-        mock_collection.where.return_value.order_by.return_value.limit.return_value.stream.return_value = (
-            mock_stream
+        return mock_collection
+
+    @patch("import_pipeline.throttling.firestore")
+    def test_check_throttle_success_fewer_than_max_attempts(self, mock_firestore):
+        """
+        Tests the success scenario where there are fewer attempts than the limit.
+        """
+        # Arrange
+        mock_collection = self._mock_collection(
+            mock_firestore, throttling.MAX_IMPORTS_PER_MINUTE - 1
         )
 
         # Act
@@ -62,48 +56,45 @@ class ThrottlingTest(unittest.TestCase):
             self.fail(f"check_throttle raised HttpsError unexpectedly: {e}")
 
         # Assert
-        mock_collection.add.assert_called_once()
-        mock_doc_ref.update.assert_called_once_with(
+        # The attempt is recorded with a single write.
+        mock_collection.add.assert_not_called()
+        mock_collection.document.return_value.set.assert_called_once_with(
             {"succeeded": True, "timestamp": SERVER_TIMESTAMP}
         )
 
     @patch("import_pipeline.throttling.firestore")
-    def test_check_throttle_success_outside_time_window(self, mock_firestore):
+    def test_check_throttle_counts_attempts_within_time_window(self, mock_firestore):
         """
-        Tests the success scenario where the Nth attempt was more than a minute ago.
+        Tests that only successful attempts from the last minute are counted.
         """
         # Arrange
-        mock_db = MagicMock()
-        mock_firestore.client.return_value = mock_db
-        mock_collection = MagicMock()
-        mock_db.collection.return_value = mock_collection
-
-        mock_doc_ref = MagicMock()
-        mock_collection.add.return_value = (None, mock_doc_ref)
-
-        now = datetime.datetime.now(datetime.timezone.utc)
-        mock_new_doc = MagicMock()
-        mock_new_doc.get.return_value = now
-        mock_doc_ref.get.return_value = mock_new_doc
-
-        # The Nth document is older than 1 minute
-        mock_stream = [MagicMock() for _ in range(throttling.MAX_IMPORTS_PER_MINUTE)]
-        old_timestamp = now - datetime.timedelta(seconds=61)
-        mock_stream[throttling.MAX_IMPORTS_PER_MINUTE - 1].get.return_value = (
-            old_timestamp
-        )
-        mock_collection.where.return_value.order_by.return_value.limit.return_value.stream.return_value = (
-            mock_stream
-        )
+        mock_collection = self._mock_collection(mock_firestore, 0)
 
         # Act
-        try:
-            throttling.check_throttle()
-        except https_fn.HttpsError as e:
-            self.fail(f"check_throttle raised HttpsError unexpectedly: {e}")
+        before = datetime.datetime.now(datetime.timezone.utc)
+        throttling.check_throttle()
+        after = datetime.datetime.now(datetime.timezone.utc)
 
         # Assert
-        mock_doc_ref.update.assert_called_once_with(
+        succeeded_filter = mock_collection.where.call_args.kwargs["filter"]
+        self.assertEqual(succeeded_filter.field_path, "succeeded")
+        self.assertEqual(succeeded_filter.op_string, "==")
+        self.assertEqual(succeeded_filter.value, True)
+        timestamp_filter = (
+            mock_collection.where.return_value.where.call_args.kwargs["filter"]
+        )
+        self.assertEqual(timestamp_filter.field_path, "timestamp")
+        self.assertEqual(timestamp_filter.op_string, ">=")
+        self.assertGreaterEqual(
+            timestamp_filter.value, before - datetime.timedelta(minutes=1)
+        )
+        self.assertLessEqual(
+            timestamp_filter.value, after - datetime.timedelta(minutes=1)
+        )
+        mock_collection.where.return_value.where.return_value.order_by.assert_called_once_with(
+            "timestamp", direction=Query.DESCENDING
+        )
+        mock_collection.document.return_value.set.assert_called_once_with(
             {"succeeded": True, "timestamp": SERVER_TIMESTAMP}
         )
 
@@ -113,27 +104,8 @@ class ThrottlingTest(unittest.TestCase):
         Tests the failure scenario where 5 attempts happened within the last minute.
         """
         # Arrange
-        mock_db = MagicMock()
-        mock_firestore.client.return_value = mock_db
-        mock_collection = MagicMock()
-        mock_db.collection.return_value = mock_collection
-
-        mock_doc_ref = MagicMock()
-        mock_collection.add.return_value = (None, mock_doc_ref)
-
-        now = datetime.datetime.now(datetime.timezone.utc)
-        mock_new_doc = MagicMock()
-        mock_new_doc.get.return_value = now
-        mock_doc_ref.get.return_value = mock_new_doc
-
-        # Mock 5 documents, all recent.
-        mock_stream = [MagicMock() for _ in range(throttling.MAX_IMPORTS_PER_MINUTE)]
-        recent_timestamp = now - datetime.timedelta(seconds=30)
-        mock_stream[throttling.MAX_IMPORTS_PER_MINUTE - 1].get.return_value = (
-            recent_timestamp
-        )
-        mock_collection.where.return_value.order_by.return_value.limit.return_value.stream.return_value = (
-            mock_stream
+        mock_collection = self._mock_collection(
+            mock_firestore, throttling.MAX_IMPORTS_PER_MINUTE
         )
 
         # Act & Assert
@@ -143,4 +115,6 @@ class ThrottlingTest(unittest.TestCase):
         self.assertEqual(
             cm.exception.code, https_fn.FunctionsErrorCode.RESOURCE_EXHAUSTED
         )
-        mock_doc_ref.update.assert_not_called()
+        mock_collection.document.return_value.set.assert_called_once_with(
+            {"succeeded": False, "timestamp": SERVER_TIMESTAMP}
+        )
@@ -12,15 +12,40 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import itertools
 import os
 from typing import List
 from shared.lumi_doc import InnerTag, InnerTagName
 import nltk
 
+# The bundled Punkt data. sent_tokenize loads it on first use and caches the
+# tokenizer, so it is only read once per process.
 nltk.data.path.append(os.path.join(os.path.dirname(__file__), "nltk_data"))
 from nltk import tokenize
 
-nltk.data.path.append(os.path.join(os.path.dirname(__file__), "nltk_data"))
+# The characters Punkt (used by sent_tokenize) ends sentences on.
+_SENTENCE_END_CHARS = (".", "?", "!")
+
+
+def _contains_sentence_end(text: str, start: int, end: int) -> bool:
+    """Returns whether text[start:end] contains a sentence-ending character."""
+    return any(text.find(char, start, end) != -1 for char in _SENTENCE_END_CHARS)
+
+
+def _find_sentence_start(text: str, sentence: str, offset: int) -> int:
+    """
+    Finds where `sentence` starts in `text`, searching from `offset`.
+
+    sent_tokenize returns sentences in order and only drops the whitespace
+    between them, so the sentence normally starts right after `offset` once
+    that whitespace is skipped. `str.find` is only used when it doesn't.
+    """
+    start = offset
+    while start < len(text) and text[start].isspace():
+        start += 1
+    if text.startswith(sentence, start):
+        return start
+    return text.find(sentence, offset)
 
 
 def _rejoin_split_sentences(
@@ -41,22 +66,36 @@ def _rejoin_split_sentences(
     if not sentences:
         return []
 
-    math_tags = [
-        tag
-        for tag in inner_tags
-        if tag.tag_name == InnerTagName.MATH
-        or tag.tag_name == InnerTagName.MATH_DISPLAY
-    ]
+    # Only math containing a sentence-ending character can have been split by
+    # sent_tokenize. These are sorted by start, so each tag can be skipped for
+    # good once the sentences have moved past it.
+    math_tags = sorted(
+        (
+            tag
+            for tag in inner_tags
+            if (
+                tag.tag_name == InnerTagName.MATH
+                or tag.tag_name == InnerTagName.MATH_DISPLAY
+            )
+            and _contains_sentence_end(
+                cleaned_text, tag.position.start_index, tag.position.end_index
+            )
+        ),
+        key=lambda tag: tag.position.start_index,
+    )
     if not math_tags:
         return sentences
 
     rejoined_sentences = []
     current_sentence_index = 0
     text_offset = 0
+    tag_index = 0
 
     while current_sentence_index < len(sentences):
         current_sentence = sentences[current_sentence_index]
-        sentence_start_pos = cleaned_text.find(current_sentence, text_offset)
+        sentence_start_pos = _find_sentence_start(
+            cleaned_text, current_sentence, text_offset
+        )
         if sentence_start_pos == -1:
             # Fallback if sentence not found, though this shouldn't happen.
             rejoined_sentences.append(current_sentence)
@@ -70,28 +109,30 @@ def _rejoin_split_sentences(
         merged_sentence = current_sentence
         num_merged = 0
 
+        # Sentence positions only increase, so tags starting before this
+        # sentence can't start in this or any later one.
+        while (
+            tag_index < len(math_tags)
+            and math_tags[tag_index].position.start_index < sentence_start_pos
+        ):
+            tag_index += 1
+
         # Check if any math tag starts in this sentence and ends in a later one.
-        for tag in math_tags:
-            tag_start = tag.position.start_index
+        # A tag spans multiple sentences if it starts within the current merged
+        # block and ends after it.
+        for tag in itertools.islice(math_tags, tag_index, None):
+            if tag.position.start_index >= sentence_end_pos:
+                break
             tag_end = tag.position.end_index
-
-            # A tag spans multiple sentences if it starts within the current merged
-            # block and ends after it.
-            if (
-                sentence_start_pos <= tag_start < sentence_end_pos
-                and tag_end > sentence_end_pos
-            ):
-                # We need to merge subsequent sentences
-                next_sentence_index = current_sentence_index + 1
-                while sentence_end_pos < tag_end and next_sentence_index < len(
-                    sentences
-                ):
-                    next_sentence = sentences[next_sentence_index]
-                    # The space is needed because sent_tokenize strips it.
-                    merged_sentence += " " + next_sentence
-                    sentence_end_pos += len(next_sentence) + 1
-                    num_merged += 1
-                    next_sentence_index += 1
+            # We need to merge subsequent sentences
+            next_sentence_index = current_sentence_index + 1 + num_merged
+            while sentence_end_pos < tag_end and next_sentence_index < len(sentences):
+                next_sentence = sentences[next_sentence_index]
+                # The space is needed because sent_tokenize strips it.
+                merged_sentence += " " + next_sentence
+                sentence_end_pos += len(next_sentence) + 1
+                num_merged += 1
+                next_sentence_index += 1
 
         rejoined_sentences.append(merged_sentence)
         current_sentence_index += 1 + num_merged
@@ -83,6 +83,76 @@ class TokenizeTest(unittest.TestCase):
         result = tokenize.tokenize_sentences(text, math_tags)
         self.assertEqual(result, expected_sentences)
 
+    def test_rejoin_split_math_sentences_with_extra_whitespace(self):
+        """
+        Tests that sentences separated by newlines and repeated spaces are
+        still located correctly when rejoining math blocks.
+        """
+        text = "First sentence.\n\nA math block a.b here.  Last sentence."
+        math_tags = [
+            InnerTag(
+                id="123",
+                tag_name=InnerTagName.MATH,
+                position=Position(start_index=30, end_index=33),
+                metadata={},
+                children=[],
+            ),
+        ]
+        expected_sentences = [
+            "First sentence.",
+            "A math block a. b here.",
+            "Last sentence.",
+        ]
+        # The split NLTK would produce if it broke the sentence inside the math.
+        sentences = ["First sentence.", "A math block a.", "b here.", "Last sentence."]
+        result = tokenize._rejoin_split_sentences(sentences, text, math_tags)
+        self.assertEqual(result, expected_sentences)
+
+    def test_rejoin_chained_math_blocks(self):
+        """
+        Tests a math block that starts inside sentences already merged for an
+        earlier math block and ends in a later sentence.
+        """
+        text = "A x. y B z. w C."
+        math_tags = [
+            InnerTag(
+                id="123",
+                tag_name=InnerTagName.MATH,
+                position=Position(start_index=2, end_index=6),
+                metadata={},
+                children=[],
+            ),
+            InnerTag(
+                id="456",
+                tag_name=InnerTagName.MATH,
+                position=Position(start_index=9, end_index=14),
+                metadata={},
+                children=[],
+            ),
+        ]
+        sentences = ["A x.", "y B z.", "w C."]
+        result = tokenize._rejoin_split_sentences(sentences, text, math_tags)
+        self.assertEqual(result, ["A x. y B z. w C."])
+
+    def test_rejoin_skips_math_without_sentence_end(self):
+        """
+        Tests that math blocks with no sentence-ending character are never
+        treated as split by the tokenizer.
+        """
+        text = "Let x = y + z be given. Then we are done."
+        math_tags = [
+            InnerTag(
+                id="123",
+                tag_name=InnerTagName.MATH,
+                position=Position(start_index=4, end_index=13),
+                metadata={},
+                children=[],
+            ),
+        ]
+        sentences = ["Let x = y + z be given.", "Then we are done."]
+        result = tokenize._rejoin_split_sentences(sentences, text, math_tags)
+        self.assertIs(result, sentences)
+
 
 if __name__ == "__main__":
     unittest.main()
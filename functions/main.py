@@ -321,8 +321,9 @@ def _add_lumi_doc(versioned_doc_ref, doc_data):
     )
 
     lumi_doc.loading_status = LoadingStatus.SUMMARIZING
-    lumi_doc.updated_timestamp = SERVER_TIMESTAMP
-    lumi_doc_json = convert_keys(asdict(lumi_doc), "snake_to_camel")
+    lumi_doc_dict = asdict(lumi_doc)
+    lumi_doc_dict["updated_timestamp"] = SERVER_TIMESTAMP
+    lumi_doc_json = convert_keys(lumi_doc_dict, "snake_to_camel")
     versioned_doc_ref.update(lumi_doc_json)
 
     # Update the metadata metadata collection doc with the image path
@@ -357,8 +358,9 @@ def _add_summaries_to_lumi_doc(versioned_doc_ref, doc_data):
     )
     doc.summaries = summaries.generate_lumi_summaries(doc)
     doc.loading_status = LoadingStatus.SUCCESS
-    doc.updated_timestamp = SERVER_TIMESTAMP
-    lumi_doc_json = convert_keys(asdict(doc), "snake_to_camel")
+    lumi_doc_dict = asdict(doc)
+    lumi_doc_dict["updated_timestamp"] = SERVER_TIMESTAMP
+    lumi_doc_json = convert_keys(lumi_doc_dict, "snake_to_camel")
     versioned_doc_ref.update(lumi_doc_json)
 
 
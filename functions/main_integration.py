@@ -31,6 +31,14 @@ with patch("firebase_admin.initialize_app"):
 from shared.lumi_doc import ArxivMetadata
 from shared.types import LoadingStatus
 
+# Firestore allows at most this many writes in a single batch.
+_FIRESTORE_MAX_BATCH_WRITES = 500
+
+# Polling schedule used while waiting for a document's loading status.
+_POLL_INITIAL_INTERVAL_SEC = 0.02
+_POLL_BACKOFF_FACTOR = 1.5
+_POLL_MAX_INTERVAL_SEC = 0.5
+
 
 def _make_mock_metadata():
     return ArxivMetadata(
@@ -76,8 +84,18 @@ class TestMainRequestArxivDocImport(unittest.TestCase):
             .collection(VERSIONS_COLLECTION)
             .stream()
         )
+        # Delete in batches rather than one RPC per document.
+        batch = self.db.batch()
+        batch_size = 0
         for doc in docs:
-            doc.reference.delete()
+            batch.delete(doc.reference)
+            batch_size += 1
+            if batch_size == _FIRESTORE_MAX_BATCH_WRITES:
+                batch.commit()
+                batch = self.db.batch()
+                batch_size = 0
+        if batch_size:
+            batch.commit()
 
         if firebase_admin._apps:
             # Get the first initialized app (our named one) and delete it
@@ -90,15 +108,26 @@ class TestMainRequestArxivDocImport(unittest.TestCase):
         """Polls Firestore for a document to reach a target loading status."""
         start_time = time.time()
         last_seen_status = "DOCUMENT_NOT_FOUND"
+        # Start polling quickly so short-lived statuses aren't missed, backing
+        # off while the document stays in the same state.
+        poll_interval_sec = _POLL_INITIAL_INTERVAL_SEC
         while time.time() - start_time < timeout_sec:
             doc = doc_ref.get()
+            current_status = last_seen_status
             if doc.exists:
                 data = doc.to_dict()
                 current_status = data.get("loadingStatus")
-                last_seen_status = current_status
                 if current_status == target_status:
                     return data
-            time.sleep(0.5)
+
+            if current_status != last_seen_status:
+                # The document moved on, so the next status may be short-lived.
+                last_seen_status = current_status
+                poll_interval_sec = _POLL_INITIAL_INTERVAL_SEC
+            time.sleep(poll_interval_sec)
+            poll_interval_sec = min(
+                poll_interval_sec * _POLL_BACKOFF_FACTOR, _POLL_MAX_INTERVAL_SEC
+            )
 
         self.fail(
             f"Timed out waiting for status '{target_status.value}'. "
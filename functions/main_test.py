@@ -25,6 +25,7 @@ from firebase_functions import https_fn
 # Local application imports
 # This patch must be applied before importing 'main'
 with patch("firebase_admin.initialize_app"):
+    import main
     from main import (
         get_personal_summary,
         get_arxiv_metadata,
@@ -35,7 +36,8 @@ with patch("firebase_admin.initialize_app"):
 import main_testing_utils
 from shared.api import LumiAnswer, LumiAnswerRequest, UserFeedback
 from shared.json_utils import convert_keys
-from shared.types import ArxivMetadata, MetadataCollectionItem
+from shared.lumi_doc import LumiSummaries
+from shared.types import ArxivMetadata, LoadingStatus, MetadataCollectionItem
 from shared.types_local_storage import PaperData
 
 
@@ -401,6 +403,69 @@ class TestMainRequestArxivDocImport(unittest.TestCase):
         self.assertIn("Incorrect arxiv_id length", response_data["error"]["message"])
 
 
+class TestMainLumiDocWrites(unittest.TestCase):
+    # create_app re-executes main.py as a new module, so these patch the module
+    # imported above rather than going through the "main" module name.
+    @patch.object(main, "_save_lumi_metadata")
+    @patch.object(main, "import_pipeline")
+    @patch.object(main, "extract_concepts")
+    def test_add_lumi_doc(
+        self, mock_extract_concepts, mock_import_pipeline, mock_save_metadata
+    ):
+        # Arrange
+        mock_lumi_doc = main_testing_utils.create_mock_lumidoc()
+        mock_extract_concepts.extract_concepts.return_value = []
+        mock_import_pipeline.import_arxiv_latex_and_pdf.return_value = (
+            mock_lumi_doc,
+            "image_path",
+        )
+        doc_data = {
+            "metadata": convert_keys(asdict(mock_lumi_doc.metadata), "snake_to_camel")
+        }
+        mock_doc_ref = MagicMock()
+
+        # Act
+        main._add_lumi_doc(mock_doc_ref, doc_data)
+
+        # Assert
+        mock_doc_ref.update.assert_called_once()
+        written = mock_doc_ref.update.call_args.args[0]
+        self.assertEqual(written["loadingStatus"], LoadingStatus.SUMMARIZING)
+        self.assertIs(written["updatedTimestamp"], SERVER_TIMESTAMP)
+        self.assertEqual(written["markdown"], mock_lumi_doc.markdown)
+        mock_save_metadata.assert_called_once()
+
+    @patch.object(main, "summaries")
+    def test_add_summaries_to_lumi_doc(self, mock_summaries):
+        # Arrange
+        mock_lumi_doc = main_testing_utils.create_mock_lumidoc()
+        mock_lumi_doc.loading_status = LoadingStatus.SUMMARIZING
+        mock_summaries.generate_lumi_summaries.return_value = LumiSummaries(
+            section_summaries=[], content_summaries=[], span_summaries=[]
+        )
+        doc_data = convert_keys(asdict(mock_lumi_doc), "snake_to_camel")
+        doc_data["updatedTimestamp"] = "2023-01-01T00:00:00Z"
+        mock_doc_ref = MagicMock()
+
+        # Act
+        main._add_summaries_to_lumi_doc(mock_doc_ref, doc_data)
+
+        # Assert
+        mock_doc_ref.update.assert_called_once()
+        written = mock_doc_ref.update.call_args.args[0]
+        self.assertEqual(written["loadingStatus"], LoadingStatus.SUCCESS)
+        self.assertIs(written["updatedTimestamp"], SERVER_TIMESTAMP)
+        self.assertEqual(
+            written["summaries"],
+            {
+                "sectionSummaries": [],
+                "contentSummaries": [],
+                "spanSummaries": [],
+                "abstractExcerptSpanId": None,
+            },
+        )
+
+
 class TestMainSaveUserFeedback(unittest.TestCase):
     @patch("firebase_admin.initialize_app")
     def setUp(self, initialize_app_mock):
@@ -13,6 +13,7 @@
 # limitations under the License.
 # ==============================================================================
 
+import functools
 import uuid
 from typing import List
 import re
@@ -94,6 +95,18 @@ def extract_concepts(abstract: str):
         return []
 
 
+@functools.lru_cache(maxsize=1024)
+def _compile_concept_pattern(name: str) -> re.Pattern:
+    """Compiles the pattern that finds a concept name in span text.
+
+    The abstract is annotated one content block at a time with the same
+    concepts, so the compiled patterns are cached by name.
+    """
+    # Use word boundaries to avoid matching substrings within words.
+    # The pattern is case-insensitive.
+    return re.compile(r"\b" + re.escape(name) + r"\b", re.IGNORECASE)
+
+
 def annotate_concepts_in_place(
     spans: List[LumiSpan], concepts: List[LumiConcept]
 ) -> List[LumiSpan]:
@@ -107,12 +120,12 @@ def annotate_concepts_in_place(
     Returns:
         The list of LumiSpan objects with added inner tags for concepts.
     """
+    concept_patterns = [
+        (concept, _compile_concept_pattern(concept.name)) for concept in concepts
+    ]
     for span in spans:
-        for concept in concepts:
-            # Use word boundaries to avoid matching substrings within words.
-            # The pattern is case-insensitive.
-            pattern = r"\b" + re.escape(concept.name) + r"\b"
-            for match in re.finditer(pattern, span.text, re.IGNORECASE):
+        for concept, pattern in concept_patterns:
+            for match in pattern.finditer(span.text):
                 start, end = match.span()
                 new_tag = InnerTag(
                     id=get_unique_id(),
@@ -169,6 +169,28 @@ class TestAnnotateConceptsInPlace(unittest.TestCase):
 
         self.assertEqual(len(spans[0].inner_tags), 0)
 
+    def test_annotates_overlapping_concepts(self):
+        """Tests that a concept inside another concept's name is tagged too."""
+        spans = [
+            LumiSpan(id="s1", text="We study large language models.", inner_tags=[])
+        ]
+        concepts = [
+            LumiConcept(
+                id="c1", name="Large Language Models", contents=[], in_text_citations=[]
+            ),
+            LumiConcept(
+                id="c2", name="Language Models", contents=[], in_text_citations=[]
+            ),
+        ]
+
+        extract_concepts.annotate_concepts_in_place(spans, concepts)
+
+        tags = [
+            (tag.metadata["concept_id"], tag.position.start_index, tag.position.end_index)
+            for tag in spans[0].inner_tags
+        ]
+        self.assertEqual(tags, [("c1", 9, 30), ("c2", 15, 30)])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -13,6 +13,7 @@
 # limitations under the License.
 # ==============================================================================
 
+import functools
 import time
 from google import genai
 from google.genai import types
@@ -34,6 +35,24 @@ class GeminiInvalidResponseException(Exception):
     pass
 
 
+@functools.cache
+def _get_default_client() -> genai.Client:
+    """Returns the client for the default API key, created on first use."""
+    return genai.Client(api_key=api_config.DEFAULT_API_KEY)
+
+
+def _get_client(api_key: str) -> genai.Client:
+    """Returns a Gemini client for the given API key.
+
+    The default-key client is shared across calls, so its connections are
+    reused. Clients for user-specified keys are created per call and are not
+    kept around.
+    """
+    if api_key == api_config.DEFAULT_API_KEY:
+        return _get_default_client()
+    return genai.Client(api_key=api_key)
+
+
 def call_predict(
     query="The opposite of happy is",
     model="gemini-2.5-flash",
@@ -44,7 +63,7 @@ def call_predict(
     else:
         logger.info(API_KEY_LOGGING_MESSAGE)
 
-    client = genai.Client(api_key=api_key)
+    client = _get_client(api_key)
 
     response = client.models.generate_content(
         model=model,
@@ -70,7 +89,7 @@ def call_predict_with_image(
     else:
         logger.info(API_KEY_LOGGING_MESSAGE)
 
-    client = genai.Client(api_key=api_key)
+    client = _get_client(api_key)
 
     truncated_query = (prompt[:200] + "...") if len(prompt) > 200 else prompt
     print(
@@ -104,7 +123,7 @@ def call_predict_with_schema(
     else:
         logger.info(API_KEY_LOGGING_MESSAGE)
 
-    client = genai.Client(api_key=api_key)
+    client = _get_client(api_key)
     start_time = time.time()
     truncated_query = (query[:200] + "...") if len(query) > 200 else query
     print(f"  > Calling Gemini with schema, prompt: '{truncated_query}'")
@@ -161,7 +180,7 @@ def format_pdf_with_latex(
     if latex_string:
         contents.insert(1, latex_string)
 
-    client = genai.Client(api_key=api_config.DEFAULT_API_KEY)
+    client = _get_default_client()
 
     response = client.models.generate_content(
         model=model,
@@ -34,7 +34,7 @@ class ImageInfo:
     caption: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiAnswerRequest:
     """Request object for getting a Lumi answer."""
 
@@ -44,7 +44,7 @@ class LumiAnswerRequest:
     image: Optional[ImageInfo] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiAnswer:
     """A Lumi answer object, containing the response and citations."""
 
@@ -19,44 +19,44 @@ from shared.types import ArxivMetadata, LoadingStatus
 from typing import List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     start_index: int
     end_index: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Highlight:
     color: str
     span_id: str
     position: Position
 
 
-@dataclass
+@dataclass(slots=True)
 class Citation:
     span_id: str
     position: Position
 
 
-@dataclass
+@dataclass(slots=True)
 class CitedContent:
     text: str
     citations: List[Citation]
 
 
-@dataclass
+@dataclass(slots=True)
 class Label:
     id: str
     label: str
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiSummary:
     id: str
     summary: "LumiSpan"
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiSummaries:
     section_summaries: List[LumiSummary]
     content_summaries: List[LumiSummary]
@@ -64,19 +64,19 @@ class LumiSummaries:
     abstract_excerpt_span_id: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Heading:
     heading_level: int
     text: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ConceptContent:
     label: str
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiConcept:
     id: str
     name: str
@@ -84,7 +84,7 @@ class LumiConcept:
     in_text_citations: List[Label]
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiSection:
     id: str
     heading: Heading
@@ -92,13 +92,13 @@ class LumiSection:
     sub_sections: Optional[List["LumiSection"]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TextContent:
     tag_name: str
     spans: List["LumiSpan"]
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageContent:
     storage_path: str
     latex_path: str
@@ -108,31 +108,31 @@ class ImageContent:
     caption: Optional["LumiSpan"] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FigureContent:
     images: List[ImageContent]
     caption: Optional["LumiSpan"] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class HtmlFigureContent:
     html: str
     caption: Optional["LumiSpan"] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ListContent:
     list_items: List["ListItem"]
     is_ordered: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class ListItem:
     spans: List["LumiSpan"]
     subListContent: ListContent | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiContent:
     id: str
     text_content: Optional[TextContent] = None
@@ -142,7 +142,7 @@ class LumiContent:
     list_content: Optional[ListContent] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiSpan:
     id: str
     text: str
@@ -165,7 +165,7 @@ class InnerTagName(StrEnum):
     FOOTNOTE = "footnote"
 
 
-@dataclass
+@dataclass(slots=True)
 class InnerTag:
     id: str
     tag_name: InnerTagName
@@ -176,24 +176,24 @@ class InnerTag:
     children: List["InnerTag"]
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiReference:
     id: str
     span: LumiSpan
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiFootnote:
     id: str
     span: LumiSpan
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiAbstract:
     contents: List[LumiContent]
 
 
-@dataclass
+@dataclass(slots=True)
 class LumiDoc:
     """Class for LumiDoc, a preprocessed Lumi document representation of a paper."""
 